@@ -0,0 +1,234 @@
+#-----Batched Land Grab Simulator-----------------------------------#
+#
+# Plays thousands of Land Grab games in lockstep with NumPy.  Every
+# game advances one move at a time together, with clamped steps and
+# first-arrival checks done as array operations across all games, so
+# the cost of the Python loop is paid once per move slot rather than
+# once per move of every game.
+#
+# Moves are given as a 3-D array of direction codes, indexed by
+# [game, round, competitor], where the codes are positions in
+# land_grab.direction_names and -1 means "no move".  Within a round
+# the competitors of each game move in the order given by a 2-D
+# [game, slot] array of competitor indexes (positions in
+# land_grab.competitor_names).
+
+from collections import namedtuple
+
+import numpy as np
+
+import land_grab
+
+no_move = -1
+
+# The outcome of a batch of games, one entry per game: the index of
+# the winning competitor (-1 if nobody reached home), the index of
+# the move that took them home (-1 if nobody did) and the final
+# [column, row] of every competitor
+BatchResult = namedtuple('BatchResult', ['winners', 'home_moves', 'positions'])
+
+
+# Convert a list of datasets in the ['Competitor A', 'Left'] format
+# into a move array and a move order array for simulate_batch.  If
+# every dataset is made of whole rounds in which each competitor moves
+# once in the same order (like those from random_moves) the compact
+# one-round-per-round layout is used, otherwise each move gets a round
+# of its own.
+def datasets_to_array(datasets):
+    count = len(land_grab.competitor_names)
+    competitor_codes = {name: code for code, name in enumerate(land_grab.competitor_names)}
+    direction_codes = {name: code for code, name in enumerate(land_grab.direction_names)}
+    coded = [[(competitor_codes[competitor], direction_codes[direction])
+              for competitor, direction in dataset]
+             for dataset in datasets]
+
+    orders = [_round_order(game, count) for game in coded]
+    if all(order is not None for order in orders):
+        rounds = max([len(game) // count for game in coded], default = 0)
+        moves = np.full((len(coded), rounds, count), no_move, dtype = np.int8)
+        for game_no, game in enumerate(coded):
+            for move_no, (competitor, direction) in enumerate(game):
+                moves[game_no, move_no // count, competitor] = direction
+        return moves, np.array(orders, dtype = np.intp).reshape(len(coded), count)
+
+    rounds = max([len(game) for game in coded], default = 0)
+    moves = np.full((len(coded), rounds, count), no_move, dtype = np.int8)
+    for game_no, game in enumerate(coded):
+        for move_no, (competitor, direction) in enumerate(game):
+            moves[game_no, move_no, competitor] = direction
+    return moves, None
+
+
+# Return the order in which competitors move if a coded game is made
+# of whole rounds with everyone moving once in the same order, or None
+def _round_order(game, count):
+    if len(game) % count != 0:
+        return None
+    if not game:
+        return list(range(count))
+    order = [competitor for competitor, direction in game[:count]]
+    if len(set(order)) != count:
+        return None
+    for move_no, (competitor, direction) in enumerate(game):
+        if competitor != order[move_no % count]:
+            return None
+    return order
+
+
+# Turn land_grab's move table into the table used by simulate_batch.
+# An extra first column is added for "no move", and cells are stored
+# as cell * table width + 1, both in the table and in simulate_batch,
+# so that every step of every game is a single lookup at
+# cell + direction, with -1 landing on the "no move" column.
+def _next_cells(size):
+    directions = len(land_grab.direction_names)
+    table = np.empty((size * size, directions + 1), dtype = np.int32)
+    table[:, 0] = np.arange(size * size)
+    table[:, 1:] = np.array(land_grab.move_table(size)).reshape(size * size, directions)
+    return (table * (directions + 1) + 1).ravel()
+
+
+# Play every game in a move array together and return a BatchResult.
+# 'order' defaults to every competitor moving in index order.
+def simulate_batch(moves, order = None, size = None):
+    size = land_grab.grid_size if size is None else size
+    moves = np.asarray(moves)
+    games, rounds, count = moves.shape
+    if order is None:
+        order = np.broadcast_to(np.arange(count), (games, count))
+    order = np.asarray(order, dtype = np.intp)
+
+    # Put the moves in the order they are made, laid out as
+    # [round, slot, game], with one gather for the whole batch, so that
+    # every step below reads one contiguous row for all games at once
+    width = len(land_grab.direction_names) + 1
+    round_moves = np.ascontiguousarray(moves.transpose(1, 2, 0)).reshape(rounds, count * games)
+    slot_index = (order * games + np.arange(games)[:, np.newaxis]).T
+    slot_moves = round_moves.take(slot_index, axis = 1)
+
+    # Every competitor starts in its corner of the grid
+    starts = land_grab.start_cells(size)
+    start_cells = np.array([land_grab.cell_number(*starts[name], size)
+                            for name in land_grab.competitor_names], dtype = np.int32)
+    cells = np.ascontiguousarray(start_cells[order].T) * width + 1
+
+    next_cells = _next_cells(size)
+    home = land_grab.cell_number(size // 2, size // 2, size) * width + 1
+    winners = np.full(games, -1, dtype = np.int8)
+    winning_slots = np.full(games, -1, dtype = np.int64)
+    step = np.empty(games, dtype = np.int32)
+
+    for round_no in range(rounds):
+        for slot in range(count):
+            # Take the (clamped) step for every game at once.  "No
+            # move" leaves the cell as it is.
+            np.add(cells[slot], slot_moves[round_no, slot], out = step)
+            cell = next_cells.take(step, out = cells[slot])
+
+            # The first competitor in each game to land on home wins.
+            # Usually nobody is on home, so the games without a winner
+            # are only picked out when someone is.
+            arrived = cell == home
+            if arrived.any():
+                arrived &= winners < 0
+                winners[arrived] = order[arrived, slot]
+                winning_slots[arrived] = round_no * count + slot
+
+    # The winning move's index is the number of moves made before it
+    before = np.arange(rounds * count)[:, np.newaxis] < winning_slots
+    made = np.count_nonzero(before & (slot_moves.reshape(rounds * count, games) != no_move), axis = 0)
+    home_moves = np.where(winners >= 0, made, -1)
+
+    # Put the final positions back in competitor order
+    positions = np.empty((games, count, 2), dtype = np.int32)
+    game_nos = np.arange(games)[:, np.newaxis]
+    cells = cells.T // width
+    positions[game_nos, order, 0] = cells % size
+    positions[game_nos, order, 1] = cells // size
+    return BatchResult(winners, home_moves, positions)
+
+
+# Mix 64-bit values with the SplitMix64 output function, which turns
+# consecutive inputs into statistically independent outputs
+def _mix(values):
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+# The four 2-bit fields of every byte value
+_two_bit_fields = ((np.arange(256)[:, np.newaxis] >> np.arange(0, 8, 2)) & 3).astype(np.int8)
+
+
+# Generate random games for many seeds at once, straight into the
+# move and order arrays used by simulate_batch.  Like random_moves,
+# each game has a random competitor order, a number of rounds uniform
+# in [0, max_rounds] and a random direction for every move, with
+# "no move" after the game's last round.
+#
+# By default the games are made with a counter-based generator (the
+# SplitMix64 stream seeded with the game's own seed), vectorised over
+# all games, so each game depends only on its own seed.  These games
+# are not the ones random_moves makes for the same seeds; with
+# compatible = True the games are made one at a time by
+# land_grab.random_move_codes instead, and are exactly the same as
+# random_moves(seed, max_rounds) but much slower to generate.
+def random_games_array(seeds, max_rounds = 35, compatible = False):
+    count = len(land_grab.competitor_names)
+    seeds = np.asarray(seeds)
+    games = len(seeds)
+    moves = np.full((games, max_rounds, count), no_move, dtype = np.int8)
+    if games == 0:
+        return moves, np.empty((0, count), dtype = np.intp)
+
+    if compatible:
+        order = np.empty((games, count), dtype = np.intp)
+        for game_no, the_seed in enumerate(seeds.tolist()):
+            codes = np.frombuffer(land_grab.random_move_codes(the_seed, max_rounds), dtype = np.uint8)
+            competitors = (codes >> 2).reshape(-1, count)
+            if len(codes):
+                order[game_no] = competitors[0]
+                moves[game_no, np.arange(len(competitors))[:, np.newaxis], competitors] = \
+                    (codes & 3).reshape(-1, count)
+            else:
+                order[game_no] = np.arange(count)
+        return moves, order
+
+    # The n-th random value of each game's stream
+    golden = np.uint64(0x9E3779B97F4A7C15)
+    keys = _mix(seeds.astype(np.uint64))
+    def stream(first, length):
+        counters = np.arange(first, first + length, dtype = np.uint64)
+        return _mix(keys[:, np.newaxis] + counters * golden)
+
+    # Value 1 decides the number of rounds and values 2 to count + 1
+    # the order, then every byte of the values after that gives four
+    # 2-bit directions, split out with a lookup table
+    num_rounds = (stream(1, 1)[:, 0] % np.uint64(max_rounds + 1)).astype(np.intp)
+    order = np.argsort(stream(2, count), axis = 1)
+    needed = -(-max_rounds * count // 32)
+    random_bytes = stream(2 + count, needed).view(np.uint8)
+    fields = _two_bit_fields.take(random_bytes, axis = 0).reshape(games, -1)
+    fields = fields[:, :max_rounds * count].reshape(games, max_rounds, count)
+    played = np.arange(max_rounds)[np.newaxis, :] < num_rounds[:, np.newaxis]
+    np.copyto(moves, fields, where = played[:, :, np.newaxis])
+    return moves, order
+
+
+# The NumPy Generator of game number 'game_no' in a batch spawned
+# from 'root_seed'.  This is the game_no-th child of the root seed's
+# SeedSequence, so every game has a stream of its own that does not
+# overlap any other game's, and it can be made by any worker without
+# spawning the children before it.  Pass it to land_grab.random_moves
+# or random_move_codes as 'generator'.
+def spawn_generator(root_seed, game_no):
+    return np.random.default_rng(np.random.SeedSequence(root_seed, spawn_key = (game_no,)))
+
+
+# Play a list of datasets in the ['Competitor A', 'Left'] format
+def simulate_datasets(datasets, size = None):
+    moves, order = datasets_to_array(datasets)
+    return simulate_batch(moves, order, size)
+
+#
+#--------------------------------------------------------------------#
@@ -0,0 +1,311 @@
+#-----Land Grab Benchmarks-------------------------------------------#
+#
+# Times the main parts of Land Grab separately, so that a change to
+# one of them can be checked for a slowdown:
+#
+#   generation   making random games with random_moves
+#   moves        applying moves with the game engine, as
+#                process_moves does, for several grid sizes and
+#                numbers of competitors
+#   drawing      drawing the competitors (draw_competitor_A to D,
+#                at each level of detail, colour_background and
+#                draw_first_circle)
+#   board        setting up the canvas with create_drawing_canvas,
+#                for several grid sizes
+#   rendering    drawing whole games with process_moves
+#
+# Drawing is done with a RecordingPen (see drawing_backends.py) in
+# place of the turtle module, which counts the drawing calls without
+# drawing anything, so the benchmarks run on a machine with no
+# display.  Each case is run several times and the fastest time is
+# kept.  The results are written as JSON so that they can be compared
+# between versions.
+#
+# Run it from the command line, for example:
+#
+#     python benchmark.py --output results.json
+#     python benchmark.py --quick
+
+import argparse
+import json
+import platform
+import sys
+import time
+from random import Random
+
+import land_grab
+
+
+# The fastest of 'repeat' runs of a function, in seconds.  'setup' is
+# called before each run, outside the timing.
+def best_time(function, repeat, setup = None):
+    best = None
+    for run in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start_time
+        if best is None or seconds < best:
+            best = seconds
+    return best
+
+
+def result(group, name, seconds, operations, **details):
+    return dict(group = group, name = name, seconds = seconds,
+                operations = operations,
+                per_second = operations / seconds if seconds else None,
+                **details)
+
+
+# A game of exactly 'moves' moves, with the competitors taking turns
+# in the same order each round, as in the games random_moves makes
+def random_dataset(moves, the_seed = 0):
+    generator = Random(the_seed)
+    competitors = list(land_grab.competitor_names)
+    generator.shuffle(competitors)
+    choose = generator.choice
+    directions = land_grab.direction_names
+    return [[competitors[move_no % 4], choose(directions)] for move_no in range(moves)]
+
+
+# Use a new RecordingPen as the turtle module, with nothing left on
+# it from earlier benchmarks
+def fresh_pen():
+    return land_grab.use_backend('recording')
+
+
+# Make games with random_moves until 'total_moves' moves have been
+# made, for games of up to 'max_rounds' rounds
+def bench_generation(total_moves, max_rounds, repeat):
+    counts = []
+    def generate():
+        counts.clear()
+        made = 0
+        the_seed = 0
+        while made < total_moves:
+            made = made + len(land_grab.random_moves(the_seed, max_rounds, quiet = True))
+            the_seed = the_seed + 1
+        counts.append(made)
+    seconds = best_time(generate, repeat)
+    return result('generation', 'random_moves', seconds, counts[0],
+                  max_rounds = max_rounds)
+
+
+# Build the move table for a grid size
+def bench_move_table(grid_size, repeat):
+    def build_table():
+        land_grab.move_table.cache_clear()
+        land_grab.move_table(grid_size)
+    seconds = best_time(build_table, repeat)
+    return result('moves', 'move_table', seconds, grid_size * grid_size,
+                  grid_size = grid_size)
+
+
+# Apply a game's moves with the engine, one at a time as
+# process_moves does and all at once, both as moves and as move codes
+def bench_moves(grid_size, moves, repeat):
+    results = []
+    dataset = random_dataset(moves)
+    seconds = best_time(lambda: land_grab.GameState(grid_size).play(dataset), repeat)
+    results.append(result('moves', 'GameState.play', seconds, moves,
+                          grid_size = grid_size))
+
+    apply_move = land_grab.GameState(grid_size).apply_move
+    def apply_moves():
+        for competitor, direction in dataset:
+            apply_move(competitor, direction)
+    seconds = best_time(apply_moves, repeat)
+    results.append(result('moves', 'GameState.apply_move', seconds, moves,
+                          grid_size = grid_size))
+
+    codes = bytes(land_grab.competitor_names.index(competitor) * 4
+                  + land_grab.direction_codes[direction]
+                  for competitor, direction in dataset)
+    seconds = best_time(lambda: land_grab.GameState(grid_size).play_codes(codes), repeat)
+    results.append(result('moves', 'GameState.play_codes', seconds, moves,
+                          grid_size = grid_size))
+    return results
+
+
+# Play a game of 'moves' move codes with 'count' competitors spread
+# around the edge of the grid, to check that a move costs the same
+# however many competitors there are
+def bench_competitors(grid_size, count, moves, repeat):
+    starts = land_grab.spread_starts(count, grid_size)
+    generator = Random(0)
+    codes = [move_no % count * 4 + generator.randrange(4) for move_no in range(moves)]
+    seconds = best_time(lambda: land_grab.GameState(grid_size, starts).play_codes(codes), repeat)
+    return result('moves', 'GameState.play_codes', seconds, moves,
+                  grid_size = grid_size, competitors = count)
+
+
+# Draw each competitor, and each of the shapes they are drawn with,
+# 'count' times
+def bench_drawing(count, repeat):
+    results = []
+    pen = fresh_pen()
+    start_time = time.perf_counter()
+    land_grab.register_sprites()
+    results.append(result('drawing', 'register_sprites',
+                          time.perf_counter() - start_time, 1))
+    for letter in 'ABCD':
+        draw_competitor = getattr(land_grab, 'draw_competitor_' + letter)
+        # The cell is cleared each time, so that it always changes and
+        # is really drawn
+        def draw():
+            for draw_no in range(count):
+                land_grab.stamps.clear()
+                draw_competitor()
+        seconds = best_time(draw, repeat)
+        results.append(result('drawing', 'draw_competitor_' + letter, seconds, count,
+                              pen_calls = sum(pen.counting(draw).values()) // count))
+    # Competitor A at each level of detail, with the number of
+    # polygons (and of points in them) in each stamp
+    for detail in land_grab.sprite_details:
+        land_grab.use_detail(detail)
+        def draw():
+            for draw_no in range(count):
+                land_grab.stamps.clear()
+                land_grab.draw_competitor_A()
+        seconds = best_time(draw, repeat)
+        shape = pen.shapes[land_grab.sprite_name('Competitor A', detail)]
+        results.append(result('drawing', 'draw_competitor_A', seconds, count, detail = detail,
+                              polygons = len(shape.components),
+                              points = sum(len(polygon) for polygon, fill_colour, outline_colour
+                                           in shape.components)))
+    land_grab.use_detail('full')
+    for name, draw_shape in [('colour_background', land_grab.colour_background),
+                             ('draw_first_circle', land_grab.draw_first_circle)]:
+        def draw():
+            for draw_no in range(count):
+                draw_shape('blue')
+        seconds = best_time(draw, repeat)
+        results.append(result('drawing', name, seconds, count,
+                              pen_calls = sum(pen.counting(draw_shape, 'blue').values())))
+    return results
+
+
+# Set up the canvas, including drawing the board, for a game on a grid
+# of the given size
+def bench_board(grid_size, repeat):
+    with land_grab.configured_game(grid_size):
+        seconds = best_time(land_grab.create_drawing_canvas, repeat, fresh_pen)
+        pen = land_grab.pen
+    return result('board', 'create_drawing_canvas', seconds, 1,
+                  grid_size = grid_size, pen_calls = pen.total())
+
+
+# Draw a whole game of 'moves' moves with process_moves
+def bench_rendering(moves, repeat):
+    dataset = random_dataset(moves)
+    def setup():
+        fresh_pen()
+        land_grab.create_drawing_canvas()
+        land_grab.reset_game()
+    seconds = best_time(lambda: land_grab.process_moves(dataset), repeat, setup)
+    return result('rendering', 'process_moves', seconds, moves,
+                  pen_calls = land_grab.pen.total())
+
+
+# The cases run by default, and the smaller set run with --quick
+full_cases = dict(generation = [(10000, 35), (1000000, 35), (1000000, 500000)],
+                  move_sizes = [7, 31, 101, 301, 1001],
+                  move_counts = [1000, 100000, 1000000],
+                  competitors = [(101, 4), (101, 64), (1001, 4), (1001, 400)],
+                  drawing = 10000,
+                  board_sizes = [7, 31, 101, 301],
+                  rendering = [1000, 100000, 1000000])
+quick_cases = dict(generation = [(10000, 35), (100000, 5000)],
+                   move_sizes = [7, 31],
+                   move_counts = [1000, 100000],
+                   competitors = [(101, 4), (101, 64)],
+                   drawing = 1000,
+                   board_sizes = [7, 31],
+                   rendering = [1000, 10000])
+
+
+def run_benchmarks(cases = full_cases, repeat = 3, groups = None, progress = None):
+    def wanted(group):
+        return groups is None or group in groups
+    def report(results):
+        for each in results:
+            if progress is not None:
+                progress(each)
+            all_results.append(each)
+
+    all_results = []
+    usual_pen = land_grab.pen
+    try:
+        if wanted('generation'):
+            for total_moves, max_rounds in cases['generation']:
+                report([bench_generation(total_moves, max_rounds, repeat)])
+        if wanted('moves'):
+            for grid_size in cases['move_sizes']:
+                report([bench_move_table(grid_size, repeat)])
+                for moves in cases['move_counts']:
+                    report(bench_moves(grid_size, moves, repeat))
+            for grid_size, count in cases['competitors']:
+                report([bench_competitors(grid_size, count, cases['move_counts'][-1], repeat)])
+        if wanted('drawing'):
+            report(bench_drawing(cases['drawing'], repeat))
+        if wanted('board'):
+            for grid_size in cases['board_sizes']:
+                report([bench_board(grid_size, repeat)])
+        if wanted('rendering'):
+            for moves in cases['rendering']:
+                report([bench_rendering(moves, repeat)])
+    finally:
+        fresh_pen()
+        land_grab.pen = usual_pen
+    return all_results
+
+
+def print_result(each):
+    details = ''.join(' {}={}'.format(key, each[key])
+                      for key in ('grid_size', 'competitors', 'detail', 'polygons', 'points',
+                                  'max_rounds')
+                      if key in each)
+    print('{:<11}{:<23}{:>10}{:>10.4f} s{:>12.0f} /s{}'.format(
+        each['group'], each['name'], each['operations'], each['seconds'],
+        each['per_second'], details))
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Time the parts of Land Grab and save the results as JSON.')
+    parser.add_argument('--output', default = 'benchmark_results.json',
+                        help = 'file to write the JSON results to, or - for the standard output '
+                               '(default benchmark_results.json)')
+    parser.add_argument('--quick', action = 'store_true',
+                        help = 'run a smaller set of cases')
+    parser.add_argument('--repeat', type = int, default = 3,
+                        help = 'number of runs of each case, keeping the fastest (default 3)')
+    parser.add_argument('--group', action = 'append',
+                        choices = ['generation', 'moves', 'drawing', 'board', 'rendering'],
+                        help = 'run only this group of cases (may be given more than once)')
+    options = parser.parse_args(args)
+
+    results = run_benchmarks(quick_cases if options.quick else full_cases,
+                             options.repeat, options.group,
+                             None if options.output == '-' else print_result)
+    report = dict(python = platform.python_version(),
+                  implementation = platform.python_implementation(),
+                  machine = platform.machine(),
+                  system = platform.system(),
+                  time = time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                  quick = options.quick,
+                  repeat = options.repeat,
+                  results = results)
+    if options.output == '-':
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    else:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent = 2)
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
@@ -0,0 +1,218 @@
+#-----Drawing Backends-----------------------------------------------#
+#
+# The drawing functions in land_grab.py draw with 'pen', which is
+# normally the turtle module.  Any object with the same drawing
+# functions can be used in its place, with land_grab.use_backend().
+# This file has the two stand-ins for turtle:
+#
+#   NullPen        draws nothing, as quickly as possible, so whole
+#                  games can be "drawn" with no display, for example
+#                  to test the drawing code
+#   RecordingPen   also draws nothing, but counts every drawing call
+#                  and can keep a log of them, to see how much
+#                  drawing each function does
+#
+# Both keep track of the little the drawing code reads back from the
+# turtle: where it is, which way it faces, its shape and the stamps
+# made.  Timer events are kept until done() or mainloop() is called
+# and then run one after another without waiting, so animated games
+# are played at full speed.
+#
+# For example, to count the calls made to draw Competitor B:
+#
+#     recorder = land_grab.use_backend('recording')
+#     land_grab.reset_game()
+#     print(recorder.counting(land_grab.draw_competitor_B))
+
+from collections import Counter
+from math import cos, radians, sin
+
+# The turtle functions the drawing code uses
+primitives = ['backward', 'begin_fill', 'bgcolor', 'circle', 'clear',
+              'clearstamp', 'color', 'done', 'dot', 'end_fill',
+              'fillcolor', 'forward', 'goto', 'hideturtle', 'home', 'left',
+              'listen', 'mainloop', 'onkey', 'ontimer', 'pd', 'pencolor',
+              'pendown', 'penup', 'pu', 'register_shape', 'right', 'setheading',
+              'setup', 'shape', 'shapesize', 'showturtle', 'speed', 'stamp',
+              'title', 'tracer', 'update', 'width', 'write']
+
+
+# A shape made by Shape('compound'), as in turtle
+class NullShape:
+
+    def __init__(self, kind = 'polygon', data = None):
+        self.kind = kind
+        self.components = []
+
+    def addcomponent(self, polygon, fill_colour, outline_colour = None):
+        self.components.append((polygon, fill_colour, outline_colour))
+
+
+class NullPen:
+
+    def __init__(self):
+        self.x, self.y = 0.0, 0.0
+        self.heading = 0.0
+        self.shape_name = 'classic'
+        self.stretch = (1, 1)
+        self.shapes = {}
+        self.stamp_count = 0
+        self.timers = []
+
+    # Another turtle on the same (imaginary) screen
+    def Turtle(self):
+        return NullPen()
+
+    def Shape(self, kind, data = None):
+        return NullShape(kind, data)
+
+    # Movement, which is followed so that position() is right
+
+    def goto(self, x, y = None):
+        if y is None:
+            x, y = x
+        self.x, self.y = x, y
+
+    def home(self):
+        self.x, self.y = 0.0, 0.0
+        self.heading = 0.0
+
+    def forward(self, distance):
+        self.x = self.x + distance * cos(radians(self.heading))
+        self.y = self.y + distance * sin(radians(self.heading))
+
+    def backward(self, distance):
+        self.x = self.x - distance * cos(radians(self.heading))
+        self.y = self.y - distance * sin(radians(self.heading))
+
+    def left(self, angle):
+        self.heading = (self.heading + angle) % 360
+
+    def right(self, angle):
+        self.heading = (self.heading - angle) % 360
+
+    def setheading(self, angle):
+        self.heading = angle % 360
+
+    # An arc ends where the exact arc would, about its centre to the
+    # left of the turtle (or to the right for a negative radius)
+    def circle(self, radius, extent = 360, steps = None):
+        turn = extent if radius >= 0 else -extent
+        centre_x = self.x - radius * sin(radians(self.heading))
+        centre_y = self.y + radius * cos(radians(self.heading))
+        offset_x, offset_y = self.x - centre_x, self.y - centre_y
+        self.x = centre_x + offset_x * cos(radians(turn)) - offset_y * sin(radians(turn))
+        self.y = centre_y + offset_x * sin(radians(turn)) + offset_y * cos(radians(turn))
+        self.heading = (self.heading + turn) % 360
+
+    def position(self):
+        return (self.x, self.y)
+
+    pos = position
+
+    # Shapes and stamps
+
+    def register_shape(self, name, shape = None):
+        self.shapes[name] = shape
+
+    def shape(self, name = None):
+        if name is None:
+            return self.shape_name
+        self.shape_name = name
+
+    def shapesize(self, stretch_wid = None, stretch_len = None, outline = None):
+        if stretch_wid is None and stretch_len is None:
+            return self.stretch + (1,)
+        self.stretch = (stretch_wid, stretch_wid if stretch_len is None else stretch_len)
+
+    def stamp(self):
+        self.stamp_count = self.stamp_count + 1
+        return self.stamp_count
+
+    # Timer events wait until the event loop is started
+
+    def ontimer(self, function, delay = 0):
+        self.timers.append(function)
+
+    def mainloop(self):
+        while self.timers:
+            self.timers.pop(0)()
+
+    done = mainloop
+
+    def tracer(self, flag = None, delay = None):
+        return None
+
+    # Everything else the drawing code uses draws nothing here
+
+    def _nothing(self, *args, **kwargs):
+        return None
+
+    begin_fill = end_fill = _nothing
+    bgcolor = clear = clearstamp = color = dot = fillcolor = _nothing
+    hideturtle = showturtle = penup = pendown = pu = pd = _nothing
+    listen = onkey = _nothing
+    pencolor = setup = speed = title = update = width = write = _nothing
+
+
+# A NullPen that counts the calls made to it, by name, in 'calls'.
+# Given log = True it also keeps a list of every call and its
+# arguments in 'log' (which can get long).  Turtles made with
+# Turtle() share their counts and log with the pen that made them.
+class RecordingPen(NullPen):
+
+    def __init__(self, log = False):
+        NullPen.__init__(self)
+        self.calls = Counter()
+        self.log = [] if log else None
+
+    def Turtle(self):
+        self.calls['Turtle'] += 1
+        turtle = RecordingPen()
+        turtle.calls = self.calls
+        turtle.log = self.log
+        return turtle
+
+    # The calls made while running function(*args)
+    def counting(self, function, *args):
+        calls_before = Counter(self.calls)
+        function(*args)
+        return self.calls - calls_before
+
+    def total(self):
+        return sum(self.calls.values())
+
+
+def _recorded(name):
+    draw = getattr(NullPen, name)
+    def record(self, *args, **kwargs):
+        self.calls[name] += 1
+        if self.log is not None:
+            self.log.append((name, args))
+        return draw(self, *args, **kwargs)
+    record.__name__ = name
+    return record
+
+for name in primitives + ['Shape', 'position']:
+    setattr(RecordingPen, name, _recorded(name))
+del name
+
+
+# The drawing backend with the given name: the turtle module itself,
+# a NullPen or a RecordingPen
+def turtle_backend():
+    import turtle
+    return turtle
+
+backends = {'turtle': turtle_backend,
+            'null': NullPen,
+            'recording': RecordingPen}
+
+def make_backend(name):
+    if name not in backends:
+        raise ValueError('Unknown drawing backend ' + repr(name) + ', expected one of '
+                         + ', '.join(backends))
+    return backends[name]()
+
+#
+#--------------------------------------------------------------------#
@@ -0,0 +1,143 @@
+#-----Exact Win Probabilities----------------------------------------#
+#
+# Works out exactly how likely each competitor is to win a game made
+# by random_moves, instead of estimating it by playing many games.
+#
+# A random game is a finite Markov chain: the competitors' order is a
+# random shuffle, the number of rounds is uniform in [0, max_rounds],
+# and in each round every competitor takes one uniformly random
+# clamped step.  The competitors' walks are independent of each
+# other, so it is enough to find, for each competitor on its own, the
+# probability of first reaching home on each of its moves (by
+# repeatedly applying the walk's transition matrix to a probability
+# distribution over cells), and then to combine those first-arrival
+# distributions round by round with the move order.
+#
+# Run it from the command line, for example:
+#
+#     python exact_odds.py --grid-size 9 --max-rounds 50
+
+import argparse
+from collections import namedtuple
+from math import comb
+
+import land_grab
+
+# The exact outcome of a random game: the probability that each
+# competitor wins, the probability that nobody reaches home, and the
+# probability that home is first reached on each move index
+# (home_moves[i] is the chance the winning move is move i)
+Odds = namedtuple('Odds', ['wins', 'no_winner', 'home_moves'])
+
+
+# The walk's transition matrix in sparse form: for each cell the
+# cells reached by each of the four equally likely moves, taken from
+# the game's move table
+def transitions(size = None):
+    size = land_grab.grid_size if size is None else size
+    table = land_grab.move_table(size)
+    directions = len(land_grab.direction_names)
+    return [table[cell * directions:(cell + 1) * directions] for cell in range(size * size)]
+
+
+# Return the probability that a competitor starting in 'start_cell'
+# first lands on home on its 1st, 2nd, ... moves, up to 'moves' moves.
+# The distribution is kept as a dictionary of the cells it could be in
+# (and has not yet reached home from), since early on only cells near
+# the start are reachable.
+def first_arrivals(start_cell, moves, size = None, next_cells = None):
+    size = land_grab.grid_size if size is None else size
+    if next_cells is None:
+        next_cells = transitions(size)
+    home = land_grab.cell_number(size // 2, size // 2, size)
+    share = 1 / len(land_grab.direction_names)
+    distribution = {start_cell: 1.0}
+    arrivals = []
+    for move_no in range(moves):
+        stepped = {}
+        for cell, probability in distribution.items():
+            for target in next_cells[cell]:
+                stepped[target] = stepped.get(target, 0.0) + probability * share
+        arrivals.append(stepped.pop(home, 0.0))
+        distribution = stepped
+    return arrivals
+
+
+# Work out the exact Odds for a game from random_moves(max_rounds =
+# max_rounds) played on a size x size grid
+def exact_odds(max_rounds = 35, size = None):
+    size = land_grab.grid_size if size is None else size
+    assert size % 2 == 1, 'Grid size must be odd'
+    names = land_grab.competitor_names
+    count = len(names)
+    next_cells = transitions(size)
+    starts = land_grab.start_cells(size)
+
+    # first[c][t] is the chance competitor c first reaches home on
+    # its move t + 1, and later[c][t] the chance it has not reached
+    # home within its first t moves
+    first = []
+    later = []
+    for name in names:
+        start_cell = land_grab.cell_number(*starts[name], size)
+        arrivals = first_arrivals(start_cell, max_rounds, size, next_cells)
+        survival = [1.0]
+        for probability in arrivals:
+            survival.append(survival[-1] - probability)
+        first.append(arrivals)
+        later.append(survival)
+
+    wins = dict.fromkeys(names, 0.0)
+    home_moves = [0.0] * (max_rounds * count)
+    for round_no in range(1, max_rounds + 1):
+        # The game only has a round this late if enough rounds were made
+        played = (max_rounds - round_no + 1) / (max_rounds + 1)
+        for competitor, name in enumerate(names):
+            arrive = first[competitor][round_no - 1]
+            if arrive == 0.0:
+                continue
+            # Each other competitor must not have reached home in an
+            # earlier round, and not in this round either if it moves
+            # before this one.  Multiplying out the polynomial
+            # product of (after + before * x) gives, as the coefficient
+            # of x^k, the total over every set of k competitors that
+            # could move first.
+            coefficients = [1.0]
+            for other in range(count):
+                if other == competitor:
+                    continue
+                before = later[other][round_no]
+                after = later[other][round_no - 1]
+                product = [0.0] * (len(coefficients) + 1)
+                for power, coefficient in enumerate(coefficients):
+                    product[power] += coefficient * after
+                    product[power + 1] += coefficient * before
+                coefficients = product
+            # The competitor is equally likely to move in each slot,
+            # and when it moves k-th every set of k others is equally
+            # likely to be the ones moving before it
+            for slot, coefficient in enumerate(coefficients):
+                probability = arrive * played * coefficient / (count * comb(count - 1, slot))
+                wins[name] += probability
+                home_moves[(round_no - 1) * count + slot] += probability
+    return Odds(wins, 1.0 - sum(wins.values()), home_moves)
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Print the exact odds of each competitor winning a random Land Grab game.')
+    parser.add_argument('--grid-size', type = int, default = land_grab.grid_size,
+                        help = 'width and height of the (odd-sized) grid')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'max_rounds passed to random_moves (default 35)')
+    options = parser.parse_args(args)
+    odds = exact_odds(options.max_rounds, options.grid_size)
+    for name, probability in odds.wins.items():
+        print('{:<28}{:>10.5f}%'.format(name, 100 * probability))
+    print('{:<28}{:>10.5f}%'.format('No competitor reached home', 100 * odds.no_winner))
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
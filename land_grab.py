@@ -5,10 +5,31 @@
 # values used for creating the drawing canvas.  You should not change
 # any of the code in this section.
 
-from turtle import *
 from math import *
 from random import *
 
+import argparse
+import os
+import re
+import sys
+import time
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from hashlib import sha256
+from itertools import islice
+
+# The drawing functions draw with 'pen', which is the turtle module
+# unless another backend is chosen.  Turtle is not imported until
+# something is first drawn with it (see load_turtle), so the game
+# engine can be imported on machines with no display.
+class TurtleOnFirstUse:
+    def __getattr__(self, name):
+        return getattr(load_turtle(), name)
+
+pen = TurtleOnFirstUse()
+
 # Define constant values for setting up the drawing canvas
 cell_width = 120 # pixels (default is 120)
 cell_height = 90 # pixels (default is 90)
@@ -32,6 +53,36 @@ assert cell_width / cell_height >= 4 / 3, 'Cells must be much wider than high'
 
 #-----Functions for Creating the Drawing Canvas----------------------#
 #
+
+# Import the turtle module and make it the pen used for drawing,
+# unless it already is.  This happens by itself the first time
+# anything is drawn without another backend having been chosen.
+def load_turtle():
+    global pen
+    if isinstance(pen, TurtleOnFirstUse):
+        import turtle
+        pen = turtle
+    return pen
+
+
+# Draw with another drawing backend from now on: 'turtle', 'null'
+# (draws nothing), 'recording' (draws nothing but counts the drawing
+# calls) or any object with turtle's drawing functions.  See
+# drawing_backends.py.  Anything drawn with the old backend is
+# forgotten, so the board and sprites are made again on the new one.
+def use_backend(backend = 'turtle'):
+    global pen, board_turtle, board_key
+    if isinstance(backend, str):
+        import drawing_backends
+        backend = drawing_backends.make_backend(backend)
+    pen = backend
+    board_turtle = None
+    board_key = None
+    registered_details.clear()
+    stamps.clear()
+    return pen
+
+
 # Set up the canvas and draw the background for the overall image
 def create_drawing_canvas(show_instructions = True, # show Part B instructions
                           label_locations = True, # label axes and home coord
@@ -39,87 +90,135 @@ def create_drawing_canvas(show_instructions = True, # show Part B instructions
                           line_colour = 'grey'): # line colour for grid
     
     # Set up the drawing canvas with enough space for the grid
-    setup(canvas_width, canvas_height)
-    bgcolor(bg_colour)
+    pen.setup(canvas_width, canvas_height)
+    pen.bgcolor(bg_colour)
 
     # Draw as quickly as possible
-    tracer(False)
+    pen.tracer(False)
+
+    # Draw the parts of the board that never change, unless they
+    # are already on the canvas from an earlier game
+    draw_board(show_instructions, label_locations, bg_colour, line_colour)
+
+    # Reset everything ready for the student's solution
+    pen.pencolor('black')
+    pen.width(1)
+    pen.penup()
+    pen.home()
+    pen.tracer(True)
+
+
+# Draw something with another pen (such as a separate turtle) in
+# place of the usual one
+@contextmanager
+def drawing_with(other_pen):
+    global pen
+    usual_pen = pen
+    pen = other_pen
+    try:
+        yield other_pen
+    finally:
+        pen = usual_pen
+
+
+# The static board (grid, labels, instructions and competitor names)
+# is drawn by a turtle of its own, so that it stays on the canvas
+# when the competitors are cleared away for the next game.  It is
+# only redrawn when something that changes its appearance changes.
+board_turtle = None
+board_key = None
+
+def draw_board(show_instructions = True, label_locations = True,
+               bg_colour = 'light grey', line_colour = 'grey'):
+    global board_turtle, board_key
+    labels = tuple((competitor.name, competitor.nation, competitor.start,
+                    competitor.label_heading, competitor.label_distance)
+                   for competitor in competitors if competitor.label_heading is not None)
+    key = (grid_size, cell_width, cell_height, show_instructions,
+           label_locations, bg_colour, line_colour, labels)
+    if board_turtle is not None and board_key == key:
+        return
+    if board_turtle is None:
+        board_turtle = pen.Turtle()
+        board_turtle.hideturtle()
+    else:
+        board_turtle.clear()
+    with drawing_with(board_turtle):
+        draw_board_layer(show_instructions, label_locations, bg_colour, line_colour)
+        label_competitors()
+    board_key = key
+
+
+# Draw the grid, the axis labels, the centre marker and the
+# instructions with the current pen
+def draw_board_layer(show_instructions, label_locations, bg_colour, line_colour):
 
     # Get ready to draw the grid
-    penup()
-    color(line_colour)
-    width(2)
+    pen.penup()
+    pen.color(line_colour)
+    pen.width(2)
 
     # Determine the left-bottom coordinate of the grid
     left_edge = -(grid_size * cell_width) // 2 
     bottom_edge = -(grid_size * cell_height) // 2
 
     # Draw the horizontal grid lines
-    setheading(0) # face east
+    pen.setheading(0) # face east
     for line_no in range(0, grid_size + 1):
-        penup()
-        goto(left_edge, bottom_edge + line_no * cell_height)
-        pendown()
-        forward(grid_size * cell_width)
+        pen.penup()
+        pen.goto(left_edge, bottom_edge + line_no * cell_height)
+        pen.pendown()
+        pen.forward(grid_size * cell_width)
         
     # Draw the vertical grid lines
-    setheading(90) # face north
+    pen.setheading(90) # face north
     for line_no in range(0, grid_size + 1):
-        penup()
-        goto(left_edge + line_no * cell_width, bottom_edge)
-        pendown()
-        forward(grid_size * cell_height)
+        pen.penup()
+        pen.goto(left_edge + line_no * cell_width, bottom_edge)
+        pen.pendown()
+        pen.forward(grid_size * cell_height)
 
     # Optionally label the axes and centre point
     if label_locations:
 
         # Mark the centre of the board (coordinate [0, 0])
-        penup()
-        home()
-        dot(30)
-        pencolor(bg_colour)
-        dot(20)
-        pencolor(line_colour)
-        dot(10)
+        pen.penup()
+        pen.home()
+        pen.dot(30)
+        pen.pencolor(bg_colour)
+        pen.dot(20)
+        pen.pencolor(line_colour)
+        pen.dot(10)
 
         # Define the font and position for the axis labels
         small_font = ('Arial', (18 * cell_width) // 100, 'normal')
         y_offset = (32 * cell_height) // 100 # pixels
 
         # Draw each of the labels on the x axis
-        penup()
+        pen.penup()
         for x_label in range(0, grid_size):
-            goto(left_edge + (x_label * cell_width) + (cell_width // 2), bottom_edge - y_offset)
-            write(chr(x_label + ord('A')), align = 'center', font = small_font)
+            pen.goto(left_edge + (x_label * cell_width) + (cell_width // 2), bottom_edge - y_offset)
+            pen.write(letter_label(x_label), align = 'center', font = small_font)
 
         # Draw each of the labels on the y axis
-        penup()
+        pen.penup()
         x_offset, y_offset = 7, 10 # pixels
         for y_label in range(0, grid_size):
-            goto(left_edge - x_offset, bottom_edge + (y_label * cell_height) + (cell_height // 2) - y_offset)
-            write(str(y_label + 1), align = 'right', font = small_font)
+            pen.goto(left_edge - x_offset, bottom_edge + (y_label * cell_height) + (cell_height // 2) - y_offset)
+            pen.write(str(y_label + 1), align = 'right', font = small_font)
 
     # Optionally write the instructions
     if show_instructions:
         # Font for the instructions
         big_font = ('Arial', (24 * cell_width) // 100, 'normal')
         # Text to the right of the grid
-        penup()
-        goto((grid_size * cell_width) // 2+ 25, -cell_height // 3)
-        setheading(90)
-        forward(100)
-        write('First competitor\nto reach home:', align = 'left', font = big_font)
-        setheading(270)
-        forward(100)
-
-        
-        
-    # Reset everything ready for the student's solution
-    pencolor('black')
-    width(1)
-    penup()
-    home()
-    tracer(True)
+        pen.penup()
+        pen.goto((grid_size * cell_width) // 2+ 25, -cell_height // 3)
+        pen.setheading(90)
+        pen.forward(100)
+        pen.write('First competitor\nto reach home:', align = 'left', font = big_font)
+        pen.setheading(270)
+        pen.forward(100)
 
 
 # End the program and release the drawing canvas to the operating
@@ -128,13 +227,13 @@ def create_drawing_canvas(show_instructions = True, # show Part B instructions
 # prevent this.
 def release_drawing_canvas(hide_cursor = True):
     # Ensure any drawing still in progress is displayed
-    update()
-    tracer(True)
+    pen.update()
+    pen.tracer(True)
     # Optionally hide the cursor
     if hide_cursor:
-        hideturtle()
+        pen.hideturtle()
     # Release the drawing canvas
-    done()
+    pen.done()
     
 
 # The following data set makes no moves at all and can be used
@@ -194,17 +293,73 @@ fixed_data_set_05 = [['Competitor A', 'Right'],
 
 
 
-def random_moves(the_seed = None, max_rounds = 35):
-    # Welcoming message
-    print('\nWelcome to Land Grab!')
-    print('Here are the randomly-generated moves:')
+# Games draw their random numbers from a random number generator of
+# their own rather than the random module's shared one, so games can
+# be made in several threads at once.  A generator can be passed in
+# as 'generator': either a random.Random or a NumPy Generator, which
+# is wrapped to give it the three random.Random methods used here.
+
+
+class NumpyRandom:
+    def __init__(self, generator):
+        self.generator = generator
+
+    def shuffle(self, items):
+        self.generator.shuffle(items)
+
+    def randint(self, low, high):
+        return int(self.generator.integers(low, high + 1))
+
+    def choice(self, items):
+        return items[int(self.generator.integers(len(items)))]
+
+
+def game_random(the_seed = None, generator = None):
+    if generator is None:
+        return Random(the_seed)
+    if hasattr(generator, 'integers'):
+        return NumpyRandom(generator)
+    return generator
+
+
+# Derive the seed of game number 'game_no' from a root seed.  Every
+# (root seed, game number) pair gives an unrelated seed, and so a
+# stream of random numbers of its own.  A game's moves depend only on
+# the root seed and its number, so a batch of games split between any
+# number of workers, in chunks of any size, is always the same.
+def spawn_seed(root_seed, game_no):
+    key = repr((root_seed, game_no)).encode()
+    return int.from_bytes(sha256(key).digest(), 'big')
+
+
+def spawn_random(root_seed, game_no):
+    return Random(spawn_seed(root_seed, game_no))
+
+
+# The competitors are the usual four unless a list of others' names
+# is given (see spread_starts).
+def random_moves(the_seed = None, max_rounds = 35, quiet = False, generator = None,
+                 competitors = None):
+    # Welcoming message (unless asked to be quiet)
+    if not quiet:
+        print('\nWelcome to Land Grab!')
+        print('Here are the randomly-generated moves:')
     # Set up the random number generator
-    seed(the_seed)
+    generator = game_random(the_seed, generator)
     # Randomise the order in which competitors move
-    competitors = ['Competitor A', 'Competitor B', 'Competitor C', 'Competitor D',]
-    shuffle(competitors)
+    if competitors is None:
+        competitors = ['Competitor A', 'Competitor B', 'Competitor C', 'Competitor D',]
+    competitors = list(competitors)
+    generator.shuffle(competitors)
     # Decide how many rounds of moves to make
-    num_rounds = randint(0, max_rounds)
+    num_rounds = generator.randint(0, max_rounds)
+    choice = generator.choice
+    # When quiet, just make the moves
+    if quiet:
+        directions = ['Left', 'Right', 'Up', 'Down']
+        return [[competitor, choice(directions)]
+                for round_no in range(num_rounds)
+                for competitor in competitors]
     # For each round generate a random move for each competitor
     # and save and print it
     moves = []
@@ -222,24 +377,395 @@ def random_moves(the_seed = None, max_rounds = 35):
           ('round' if num_rounds == 1 else 'rounds'))
     return moves
 
+
+# Generate the same moves as random_moves(the_seed, max_rounds) as
+# move codes (competitor * 4 + direction, see move_codec.py), one per
+# byte.  The moves are made in exactly the same way as random_moves
+# makes them, so for a given seed or generator the two functions give
+# the same game.  With 'count' competitors other than four, the codes
+# match random_moves given that many competitors' names; more than 64
+# competitors' codes don't fit in bytes, and are returned in an array.
+def random_move_codes(the_seed = None, max_rounds = 35, generator = None, count = 4):
+    generator = game_random(the_seed, generator)
+    competitors = list(range(count))
+    generator.shuffle(competitors)
+    num_rounds = generator.randint(0, max_rounds)
+    choose = generator.choice
+    directions = (0, 1, 2, 3)
+    codes = [competitor * 4 + choose(directions)
+             for round_no in range(num_rounds)
+             for competitor in competitors]
+    return bytes(codes) if count <= 64 else array('l', codes)
+
+
+# Generate the games for many seeds at once, each as move codes (see
+# random_move_codes).  For large batches, batch_sim.random_games_array
+# can generate the games straight into NumPy arrays instead.
+def random_games(seeds, max_rounds = 35):
+    return [random_move_codes(the_seed, max_rounds) for the_seed in seeds]
+
 #
 #--------------------------------------------------------------------#
 
 
 
+#-----Reading Moves from Files and Streams---------------------------#
+#
+# Moves can also come from a line-oriented source such as a file, a
+# pipe or the keyboard, one move per line.  A line may be written the
+# way random_moves prints moves, such as ['Competitor A', 'Left'], or
+# as 'Competitor A,Left'.  Blank lines and lines that don't mention a
+# competitor (such as random_moves' welcome message) are skipped, so
+# the printed output of random_moves can be replayed as it is.
+#
+# The moves are read lazily, one line at a time, so a log of any
+# length, or a live feed of moves, can be replayed without holding it
+# all in memory.
+
+move_pattern = re.compile(r"""^\[?\s*'?(Competitor [A-Z]+)'?\s*[,\t]\s*'?(Left|Right|Up|Down)'?\s*\]?$""")
+
+
+# Turn lines of text into moves in the ['Competitor A', 'Left'] format
+def read_moves(lines):
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if 'Competitor' not in line:
+            continue
+        match = move_pattern.match(line)
+        if match is None:
+            raise ValueError('Line ' + str(line_no) + ' is not a valid move: ' + line)
+        yield [match.group(1), match.group(2)]
+
+
+# Read the moves in a file, or from the standard input if the file
+# name is '-'
+def open_moves(file_name):
+    if file_name == '-':
+        yield from read_moves(sys.stdin)
+    else:
+        with open(file_name) as move_file:
+            yield from read_moves(move_file)
 
-#   Setup
+#
+#--------------------------------------------------------------------#
 
 
-tracer(False) # This is used to speed up the process
 
+#-----Headless Game Engine-------------------------------------------#
+#
+# The rules of the game, kept separate from the drawing code so that
+# games can be played and analysed without a drawing canvas.  Cells
+# are identified by an integer cell coordinate [column, row], where
+# [0, 0] is the bottom-left cell (labelled 'A1' on the board), or by
+# the single cell number row * grid_size + column.  The home cell is
+# in the middle of the grid.  Grids of any odd size can be used, with
+# any number of competitors (see GameState and spread_starts).
+
+# The competitors and the kinds of move, in a fixed order so that
+# tools working with arrays of moves can refer to them by index
+competitor_names = ['Competitor A', 'Competitor B', 'Competitor C', 'Competitor D']
+direction_names = ['Left', 'Right', 'Up', 'Down']
+direction_codes = {direction: code for code, direction in enumerate(direction_names)}
+competitor_codes = {competitor: code for code, competitor in enumerate(competitor_names)}
+
+# The change in [column, row] caused by each kind of move
+direction_steps = {'Left': (-1, 0),
+                   'Right': (1, 0),
+                   'Up': (0, 1),
+                   'Down': (0, -1)}
+
+# The outcome of a game: the first competitor to reach home (or None),
+# the index in the dataset of the move that got them there (or None)
+# and every competitor's final cell coordinate
+GameResult = namedtuple('GameResult', ['winner', 'home_move', 'positions'])
+
+
+# The cell each competitor starts in (the four corners of the grid)
+def start_cells(size = None):
+    last = (grid_size if size is None else size) - 1
+    return {'Competitor A': (0, last),
+            'Competitor B': (last, last),
+            'Competitor C': (0, 0),
+            'Competitor D': (last, 0)}
+
+
+# The letters naming a column of the grid or a competitor: 'A' to
+# 'Z', then 'AA', 'AB' and so on, like spreadsheet columns
+def letter_label(number):
+    letters = ''
+    number = number + 1
+    while number:
+        number, letter = divmod(number - 1, 26)
+        letters = chr(letter + ord('A')) + letters
+    return letters
+
+
+# Starting cells for any number of competitors: the usual four in
+# their corners, and any more spread evenly around the edge of the
+# grid between them, clockwise from the top left.  The competitors
+# after Competitor D are named Competitor E, Competitor F and so on.
+def spread_starts(count, size = None):
+    size = grid_size if size is None else size
+    last = size - 1
+    starts = dict(list(start_cells(size).items())[:count])
+    edge = ([(column, last) for column in range(1, last)]
+            + [(last, row) for row in range(last - 1, 0, -1)]
+            + [(column, 0) for column in range(last - 1, 0, -1)]
+            + [(0, row) for row in range(1, last)])
+    extra = count - len(starts)
+    if extra > len(edge):
+        raise ValueError('A ' + str(size) + 'x' + str(size) + ' grid has room for at most '
+                         + str(len(edge) + 4) + ' competitors around its edge')
+    for number in range(extra):
+        starts['Competitor ' + letter_label(number + 4)] = edge[(2 * number + 1) * len(edge)
+                                                               // (2 * extra)]
+    return starts
+
+
+# Convert between cell coordinates and cell numbers
+def cell_number(column, row, size = None):
+    return row * (grid_size if size is None else size) + column
+
+def cell_coordinate(cell, size = None):
+    row, column = divmod(cell, grid_size if size is None else size)
+    return column, row
+
+
+# Convert a cell coordinate into the pixel coordinate of the middle
+# of that cell on the drawing canvas
+def cell_centre(column, row, size = None):
+    size = grid_size if size is None else size
+    return ((column - size // 2) * cell_width,
+            (row - size // 2) * cell_height)
+
+
+# The steps of direction_steps in direction code order
+code_steps = tuple(direction_steps[direction] for direction in direction_names)
+
+
+# The cell coordinate reached by making the move with the given
+# direction code from [column, row].  A move that would leave the
+# grid stays in the same cell.  This is the only place the rule is
+# written down: the move table is built from it, and GameState uses
+# it directly on grids too big for a table.
+def step_cell(column, row, direction_code, size):
+    column_step, row_step = code_steps[direction_code]
+    if 0 <= column + column_step < size and 0 <= row + row_step < size:
+        return column + column_step, row + row_step
+    return column, row
+
+
+# Build the table of where every move leads.  The entry at
+# cell * 4 + direction code is the number of the cell reached by
+# making that move from that cell (see step_cell).  The table is
+# built once for each grid size.  It has four entries for every cell,
+# so GameState only uses it for grids of up to largest_table_size
+# cells square.
+largest_table_size = 255
+
+@lru_cache(maxsize = None)
+def move_table(size = None):
+    if size is None:
+        return move_table(grid_size)
+    table = []
+    for cell in range(size * size):
+        column, row = cell_coordinate(cell, size)
+        for direction_code in range(len(code_steps)):
+            table.append(cell_number(*step_cell(column, row, direction_code, size), size))
+    return tuple(table)
+
+
+# The state of a game in progress.  Any number of competitors can
+# play, each starting in the cell given for it in 'starts' (by
+# default the usual four in their corners).  Competitors are numbered
+# in the order of 'starts', and their cell coordinates are kept in
+# two arrays, 'columns' and 'rows', indexed by those numbers, so a
+# move costs the same however many competitors there are and playing
+# more moves uses no more memory.  Coordinates are stored as 16-bit
+# integers, which allows grids of up to 32767 cells square.  Whole
+# games are played with the cells in a list of cell numbers, which
+# is quicker, and the arrays are brought up to date at the end.
+class GameState:
+
+    def __init__(self, size = None, starts = None):
+        size = grid_size if size is None else size
+        if starts is None:
+            starts = start_cells(size)
+        if not 0 < size <= 32767:
+            raise ValueError('Grid size must be between 1 and 32767, not ' + str(size))
+        self.size = size
+        self.names = list(starts)
+        self.codes = {competitor: code for code, competitor in enumerate(self.names)}
+        self.columns = array('h', [column for column, row in starts.values()])
+        self.rows = array('h', [row for column, row in starts.values()])
+        self.home_column = self.home_row = size // 2
+        self.home = cell_number(size // 2, size // 2, size)
+        for competitor, (column, row) in starts.items():
+            if not (0 <= column < size and 0 <= row < size):
+                raise ValueError(competitor + ' starts outside the grid, at ' + str((column, row)))
+            if (column, row) == (self.home_column, self.home_row):
+                raise ValueError(competitor + ' cannot start at home')
+        self.table = move_table(size) if size <= largest_table_size else None
+        self.winner = None
+        self.home_move = None
+        self.move_count = 0
+
+    # Apply a single move and return the number of the competitor's new
+    # cell.  A move that would leave the grid leaves the competitor
+    # where it was, and the first competitor to land on home wins.
+    def apply_move(self, competitor, direction):
+        return self.apply_code(self.codes[competitor] * 4 + direction_codes[direction])
+
+    # Apply a single move given as a move code (competitor * 4 +
+    # direction) and return the number of the competitor's new cell
+    def apply_code(self, code):
+        competitor = code >> 2
+        size = self.size
+        if self.table is not None:
+            cell = self.table[(self.rows[competitor] * size + self.columns[competitor]) * 4
+                              + (code & 3)]
+            row, column = divmod(cell, size)
+        else:
+            column, row = step_cell(self.columns[competitor], self.rows[competitor],
+                                    code & 3, size)
+            cell = row * size + column
+        self.columns[competitor] = column
+        self.rows[competitor] = row
+        if cell == self.home and self.winner is None:
+            self.winner = self.names[competitor]
+            self.home_move = self.move_count
+        self.move_count = self.move_count + 1
+        return cell
+
+    # Apply every move in a dataset.  This is the same as calling
+    # apply_move for each one, but with the lookups kept in local
+    # variables because it is the inner loop of batch analysis.  With
+    # stop_at_home = True the game stops as soon as someone reaches
+    # home, without reading any more moves, for analysis that only
+    # needs the winner.
+    def play(self, dataset, stop_at_home = False):
+        codes = self.codes
+        if self.table is None:
+            return self.play_codes((codes[competitor] * 4 + direction_codes[direction]
+                                    for competitor, direction in dataset), stop_at_home)
+        cells = self._cells()
+        table = self.table
+        directions = direction_codes
+        home = self.home
+        winner = self.winner
+        move_count = self.move_count
+        for competitor, direction in dataset:
+            code = codes[competitor]
+            cell = table[cells[code] * 4 + directions[direction]]
+            cells[code] = cell
+            move_count = move_count + 1
+            if cell == home and winner is None:
+                winner = competitor
+                self.home_move = move_count - 1
+                if stop_at_home:
+                    break
+        self._store(cells)
+        self.winner = winner
+        self.move_count = move_count
+        return self.result()
+
+    # Apply every move in a sequence of move codes (competitor * 4 +
+    # direction, see move_codec.py), such as those from
+    # random_move_codes or a replay archive.  With more than 64
+    # competitors the codes no longer fit in bytes, but any sequence
+    # of integers, such as an array, can be played.
+    def play_codes(self, codes, stop_at_home = False):
+        if self.table is None:
+            return self._play_steps(codes, stop_at_home)
+        cells = self._cells()
+        table = self.table
+        home = self.home
+        winner = self.winner
+        move_count = self.move_count
+        for code in codes:
+            competitor = code >> 2
+            cell = table[cells[competitor] * 4 + (code & 3)]
+            cells[competitor] = cell
+            move_count = move_count + 1
+            if cell == home and winner is None:
+                winner = self.names[competitor]
+                self.home_move = move_count - 1
+                if stop_at_home:
+                    break
+        self._store(cells)
+        self.winner = winner
+        self.move_count = move_count
+        return self.result()
+
+    # Play move codes on a grid too big for a move table
+    def _play_steps(self, codes, stop_at_home):
+        columns = self.columns.tolist()
+        rows = self.rows.tolist()
+        step = step_cell
+        size = self.size
+        home_column = self.home_column
+        home_row = self.home_row
+        winner = self.winner
+        move_count = self.move_count
+        for code in codes:
+            competitor = code >> 2
+            column, row = step(columns[competitor], rows[competitor], code & 3, size)
+            columns[competitor] = column
+            rows[competitor] = row
+            move_count = move_count + 1
+            if column == home_column and row == home_row and winner is None:
+                winner = self.names[competitor]
+                self.home_move = move_count - 1
+                if stop_at_home:
+                    break
+        self.columns[:] = array('h', columns)
+        self.rows[:] = array('h', rows)
+        self.winner = winner
+        self.move_count = move_count
+        return self.result()
+
+    # Each competitor's cell number in a list, and back again
+    def _cells(self):
+        size = self.size
+        return [row * size + column for column, row in zip(self.columns, self.rows)]
+
+    def _store(self, cells):
+        for competitor, cell in enumerate(cells):
+            self.rows[competitor], self.columns[competitor] = divmod(cell, self.size)
+
+    # Each competitor's current cell number
+    @property
+    def cells(self):
+        return {competitor: row * self.size + column
+                for competitor, column, row in zip(self.names, self.columns, self.rows)}
+
+    # Each competitor's current cell coordinate
+    def positions(self):
+        return {competitor: (column, row)
+                for competitor, column, row in zip(self.names, self.columns, self.rows)}
+
+    def result(self):
+        return GameResult(self.winner, self.home_move, self.positions())
+
+
+# Play a whole game without drawing anything and return its result,
+# or stop as soon as someone reaches home if stop_at_home is True
+def simulate(dataset, size = None, starts = None, stop_at_home = False):
+    return GameState(size, starts).play(dataset, stop_at_home)
+
+#
+#--------------------------------------------------------------------#
 
-#   To place all competitors in their respective starting points
-#   the "new" positions for each competitor are defined.
-new_A_position = ((-cell_width*(grid_size/(2+(1/3))), (cell_height*(grid_size/(2+(1/3))))))
-new_B_position = ((cell_width*(grid_size/(2+(1/3))), (cell_height*(grid_size/(2+(1/3))))))
-new_C_position = ((-cell_width*(grid_size/(2+(1/3))), (-cell_height*(grid_size/(2+(1/3))))))
-new_D_position = (((cell_width*(grid_size/(2+(1/3))), (-cell_height*(grid_size/(2+(1/3)))))))
+
+
+
+#   Setup
+
+
+#   Each competitor is described by a record (see the Competitor
+#   class below) holding its name, nation, artwork and label, and
+#   the position it was last drawn in, which starts out as the
+#   middle of its starting cell.
 
 
 #   This variable is used to determine which competitor
@@ -247,108 +773,35 @@ new_D_position = (((cell_width*(grid_size/(2+(1/3))), (-cell_height*(grid_size/(
 first_middle = False
 
 
-#   The following code is used to name each competitor and
+#   The following function is used to name each competitor and
 #   to give the simulation a title.
 
+def label_competitors():
+    pen.pu()
+    pen.pencolor('black')
+    for competitor in competitors:
+    #   The position of where the label will go is determined,
+    #   beside the competitor's starting cell.
+        if competitor.label_heading is None:
+            continue
+        pen.goto(cell_centre(*competitor.start))
+        pen.setheading(270)
+        pen.forward(cell_height/4)
+        pen.setheading(competitor.label_heading)
+        pen.forward(competitor.label_distance)
+    #   Then the label is written
+        pen.write(competitor.name + ' \n' + competitor.nation, font =('Arial', 15))
+
+    #   The title is then labelled
+    pen.goto(0,0)
+    pen.setheading(90)
+    pen.forward(cell_height*4)
+    pen.setheading(270)
+    pen.forward(40)
+    pen.setheading(180)
+    pen.forward(80)
+    pen.write('The Four Nations', font =('Arial', 15))
 
-pu()
-#   The position of where the label will go is determined.
-goto(new_A_position)
-setheading(270)
-forward(cell_height/4)
-setheading(180)
-forward(250)
-#   Then the label is written
-write('Competitor A \nThe Water Tribe', font =('Arial', 15))
-
-#   This is repeated for each of the four competitors. 
-goto(new_B_position)
-setheading(270)
-forward(cell_height/4)
-setheading(0)
-forward(100)
-write('Competitor B \nThe Earth Kingdom', font =('Arial', 15))
-
-goto(new_C_position)
-setheading(270)
-forward(cell_height/4)
-setheading(180)
-forward(250)
-write('Competitor C \nThe Air Nomads', font =('Arial', 15))
-
-goto(new_D_position)
-setheading(270)
-forward(cell_height/4)
-setheading(0)
-forward(100)
-write('Competitor D \nThe Fire Nation', font =('Arial', 15))
-
-#   The title is then labelled
-goto(0,0)
-setheading(90)
-forward(cell_height*4)
-setheading(270)
-forward(40)
-setheading(180)
-forward(80)
-write('The Four Nations', font =('Arial', 15))
-
-####################################################################
-
-#   Movement
-
-#   Movement is defined below. These functions are defined by what
-#   actions the turtle must take after receiving direction.
-
-
-def move_left():
-#   Pen is lifted in the air before moving.
-    pu()
-#   Turtle is set to the direction of the function (left).
-    setheading(180)
-#   Turtle moves forward to the next cell.
-    forward(cell_width)
-#   If the x-co-ordinate is out of the defined grid size
-#   then the turtle will move back to the original cell.
-    if xcor() < (-cell_width*grid_size/2):
-        backward(cell_width)
-#   The turtle is set back to the original direction.
-    setheading(90)
-#   Pen is placed down. 
-    pd()
-
-#   This is then repeated for all four directions, with
-#   boundaries being set for each movement. 
-    
-def move_right():
-    pu()
-    setheading(0)
-    forward(cell_width)
-    if xcor() > (cell_width*grid_size/2):
-        backward(cell_width)
-    setheading(90)
-    pd()
-    
-    
-def move_down():
-    pu()
-    setheading(270)
-    forward(cell_height)
-    if ycor() < (-cell_height*grid_size/2):
-        backward(cell_height)
-    setheading(90)
-    pd()
-        
-
-def move_up():
-    pu()
-    setheading(90)
-    forward(cell_height)
-    if ycor() > (cell_height*grid_size/2):
-        backward(cell_height)
-    pd()
-    
-    
 ################################################################
     
 #   Drawing the competitors.
@@ -360,638 +813,1155 @@ def move_up():
 def colour_background(colour):
 #   This function creates a rectangle that covers
 #   the entire cell in the colour specified. 
-    pu()
-    right(270)
-    forward(45)
-    right(270)
-    forward(60)
-    pd()
-    color(colour)
-    fillcolor(colour)
-    begin_fill()
-    right(180)
-    forward(120)
-    right(90)
-    forward(90)
-    right(90)
-    forward(120)
-    right(90)
-    forward(90)
-    end_fill()
-    pu()
-    right(90)
-    forward(60)
-    right(90)
-    forward(45)
-    right(180)
+    pen.pu()
+    pen.right(270)
+    pen.forward(45)
+    pen.right(270)
+    pen.forward(60)
+    pen.pd()
+    pen.color(colour)
+    pen.fillcolor(colour)
+    pen.begin_fill()
+    pen.right(180)
+    pen.forward(120)
+    pen.right(90)
+    pen.forward(90)
+    pen.right(90)
+    pen.forward(120)
+    pen.right(90)
+    pen.forward(90)
+    pen.end_fill()
+    pen.pu()
+    pen.right(90)
+    pen.forward(60)
+    pen.right(90)
+    pen.forward(45)
+    pen.right(180)
     
 
 def draw_first_circle(colour):
 #   This function draws a circle in the middle
 #   of the cell in the colour specified. 
-    right(90)
-    forward(45)
-    right(270)
-    pd()
-    color('black')
-    fillcolor(colour)
-    begin_fill()
-    circle(45)
-    end_fill()
-    pu()
-
-
-def draw_competitor_A():
-#   This function draws one of the four competitors.
-
-#   The turtle heads to the last defined position
-#   to begin drawing.
-    pu()
-    goto(new_A_position)
-    setheading(0)
+    pen.right(90)
+    pen.forward(45)
+    pen.right(270)
+    pen.pd()
+    pen.color('black')
+    pen.fillcolor(colour)
+    pen.begin_fill()
+    pen.circle(45)
+    pen.end_fill()
+    pen.pu()
+
+
+def draw_artwork_A():
+#   This function draws the first of the four competitors
+#   in the cell the turtle is in.
+    pen.pu()
+    pen.setheading(0)
 #   The cell is then coloured in using the
 #   function created previously. 
     colour_background('navy')
 #   A circle is drawn in the middle of this cell.
     draw_first_circle('slate gray')
 #   A second circle is drawn within the first circle. 
-    color('black')
-    fillcolor('midnight blue')
-    pd()
-    begin_fill()
-    circle(32)
-    end_fill()
+    pen.color('black')
+    pen.fillcolor('midnight blue')
+    pen.pd()
+    pen.begin_fill()
+    pen.circle(32)
+    pen.end_fill()
 #   A wavy line is then drawn within the second
 #   circle. 
-    fillcolor('steel blue')
-    begin_fill()
-    circle(16,180)
-    circle(-16,180)
-    forward(5)
-    right(180)
-    circle(16,180)
-    circle(-16,180)
-    backward(5)
-    end_fill()
-    pu()
+    pen.fillcolor('steel blue')
+    pen.begin_fill()
+    pen.circle(16,180)
+    pen.circle(-16,180)
+    pen.forward(5)
+    pen.right(180)
+    pen.circle(16,180)
+    pen.circle(-16,180)
+    pen.backward(5)
+    pen.end_fill()
+    pen.pu()
 #   The turtle then returns to the original
 #   position ready to draw the next move. 
-    right(90)
-    forward(45)
-    right(90)
-    backward(10)
+    pen.right(90)
+    pen.forward(45)
+    pen.right(90)
+    pen.backward(10)
     
 
-def draw_competitor_B():
+def draw_artwork_B():
 #   This function draws the second of the four competitors
-
-#   Once again, the turtle heads to the last
-#   defined position to begin drawing. 
-    pu()
-    goto(new_B_position)
-    setheading(0)
+#   in the cell the turtle is in.
+    pen.pu()
+    pen.setheading(0)
     colour_background('dark goldenrod')
-    color('gold')
+    pen.color('gold')
     draw_first_circle('gold')
 #   After colouring the cell and drawing the
 #   first circle, this time a second circle
 #   is drawn directly inside the first. 
-    pu()
-    fillcolor('dark green')
-    left(90)
-    forward(45)
-    left(90)
-    forward(45)
-    left(180)
-    forward(10)
-    setheading(0)
-    pd()
-    begin_fill()
-    circle(35)
-    end_fill()
-    pu()
+    pen.pu()
+    pen.fillcolor('dark green')
+    pen.left(90)
+    pen.forward(45)
+    pen.left(90)
+    pen.forward(45)
+    pen.left(180)
+    pen.forward(10)
+    pen.setheading(0)
+    pen.pd()
+    pen.begin_fill()
+    pen.circle(35)
+    pen.end_fill()
+    pen.pu()
 #   After the second circle is drawn,
 #   a square is drawn in the middle. 
-    color('black')
-    fillcolor('dark goldenrod')
-    setheading(90)
-    forward(33)
-    right(90)
-    begin_fill()
-    forward(8.75)
-    pd()
-    right(90)
-    forward(8.75)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
+    pen.color('black')
+    pen.fillcolor('dark goldenrod')
+    pen.setheading(90)
+    pen.forward(33)
+    pen.right(90)
+    pen.begin_fill()
+    pen.forward(8.75)
+    pen.pd()
+    pen.right(90)
+    pen.forward(8.75)
+    pen.right(90)
+    pen.forward(17.5)
+    pen.right(90)
+    pen.forward(17.5)
+    pen.right(90)
+    pen.forward(17.5)
+    pen.right(90)
+    pen.forward(17.5)
 #   The turtle then returns back to the
 #   original position. 
-    pu()
-    end_fill()
-    setheading(90)
-    forward(11)
-    left(90)
-    forward(9)
-    setheading(90)
+    pen.pu()
+    pen.end_fill()
+    pen.setheading(90)
+    pen.forward(11)
+    pen.left(90)
+    pen.forward(9)
+    pen.setheading(90)
     
 
-def draw_competitor_C():
+def draw_artwork_C():
 #   This function draws the third of the four competitors
-
-#   Once again, the turtle heads to the last
-#   defined position to begin drawing. 
-    pu()
-    goto(new_C_position)
-    setheading(0)
+#   in the cell the turtle is in.
+    pen.pu()
+    pen.setheading(0)
 #   The cell is coloured in and a circle is drawn
 #   in the middle of the cell. 
     colour_background('cornflower blue')
     draw_first_circle('light slate blue')
-    color('black')
-    pu()
-    forward(cell_height/2)
-    left(90)
-    forward(45)
-    setheading(0)
-    fillcolor('royal blue')
-    begin_fill()
-    pd()
+    pen.color('black')
+    pen.pu()
+    pen.forward(cell_height/2)
+    pen.left(90)
+    pen.forward(45)
+    pen.setheading(0)
+    pen.fillcolor('royal blue')
+    pen.begin_fill()
+    pen.pd()
 #   A spiral is then drawn inside the existing
 #   circle. 
-    circle(-30, 180)
-    circle(-15, 180)
-    circle(-10, 90)
-    setheading(90)
-    circle(17,180)
-    circle(35,90)
-    circle(33,90)
-    setheading(90)
-    circle(40,90)
-    end_fill()
-    pu()
+    pen.circle(-30, 180)
+    pen.circle(-15, 180)
+    pen.circle(-10, 90)
+    pen.setheading(90)
+    pen.circle(17,180)
+    pen.circle(35,90)
+    pen.circle(33,90)
+    pen.setheading(90)
+    pen.circle(40,90)
+    pen.end_fill()
+    pen.pu()
 #   The turtle then heads back to the original
 #   position. 
-    setheading(180)
-    forward(4)
-    setheading(270)
-    forward(43)
-    setheading(90)
+    pen.setheading(180)
+    pen.forward(4)
+    pen.setheading(270)
+    pen.forward(43)
+    pen.setheading(90)
     
-def draw_competitor_D():
+def draw_artwork_D():
 #   This function draws the fourth of the four competitors
-
-#   Once again, the turtle heads to the last
-#   defined position to begin drawing. 
-    pu()
-    goto(new_D_position)
-    setheading(0)
+#   in the cell the turtle is in.
+    pen.pu()
+    pen.setheading(0)
 #   The cell is coloured in and a circle is
 #   drawn in the middle of the cell. 
     colour_background('black')
     draw_first_circle('firebrick')
 #   The shape of a flame is then drawn. 
-    left(90)
-    forward(45)
-    right(90)
-    forward(40)
-    fillcolor('black')
-    begin_fill()
-    pd()
-    setheading(255)
-    forward(30)
-    circle(10, 90)
-    setheading(-215)
-    forward(15)
-    circle(-10,90)
-    forward(10)
-    setheading(230)
-    forward(20)
-    circle(20,80)
-    setheading(280)
-    circle(30,20)
-    circle(25,150)
-    setheading(90)
-    circle(50,20)
-    circle(50,20)
-    forward(25)
-    end_fill()
-    pu()
+    pen.left(90)
+    pen.forward(45)
+    pen.right(90)
+    pen.forward(40)
+    pen.fillcolor('black')
+    pen.begin_fill()
+    pen.pd()
+    pen.setheading(255)
+    pen.forward(30)
+    pen.circle(10, 90)
+    pen.setheading(-215)
+    pen.forward(15)
+    pen.circle(-10,90)
+    pen.forward(10)
+    pen.setheading(230)
+    pen.forward(20)
+    pen.circle(20,80)
+    pen.setheading(280)
+    pen.circle(30,20)
+    pen.circle(25,150)
+    pen.setheading(90)
+    pen.circle(50,20)
+    pen.circle(50,20)
+    pen.forward(25)
+    pen.end_fill()
+    pen.pu()
 #   The turtle then heads back to the original
 #   position. 
-    setheading(270)
-    forward(42.5)
+    pen.setheading(270)
+    pen.forward(42.5)
 
 
-def absolute_draw_A():
-#   These functions are used to draw the
-#   competitors, however, do not use co-ordinates
-#   and can be called in all spaces of the grid.
-
-#   Therefore, the following functions are used
-#   to draw the first competitor to reach the middle
-#   cell.
-
+####################################################
+#   Sprites
+
+#   Rather than redrawing a competitor's artwork every time it
+#   moves, the artwork is drawn once, recorded as a set of
+#   polygons and registered with turtle as a compound shape.
+#   Each move then only needs a single stamp of that shape.
+
+
+class ShapeRecorder:
+#   This class stands in for the turtle while a competitor's
+#   artwork is drawn.  It follows the turtle's movements without
+#   drawing anything, and records each filled area and each line
+#   drawn as a polygon with its fill and outline colours.
+
+    def __init__(self):
+        self.x, self.y = 0.0, 0.0
+        self.heading = 0.0
+        self.drawing = True
+        self.pen_colour = 'black'
+        self.fill_colour = 'black'
+        self.components = []
+        self.line = [(self.x, self.y)]
+        self.fill_path = None
+        self.fill_index = None
+
+#   Lines are finished (and recorded) whenever the pen is lifted,
+#   changes colour or starts or ends a fill, just as turtle does.
+    def _finish_line(self):
+        if self.drawing and len(self.line) > 1:
+#   A line is recorded as an unfilled polygon that retraces its
+#   steps, so that closing the polygon adds nothing to it.
+            self.components.append((tuple(self.line + self.line[-2:0:-1]), '', self.pen_colour))
+        self.line = [(self.x, self.y)]
+
+    def _go(self, x, y):
+        if self.drawing:
+            self.line.append((x, y))
+        if self.fill_path is not None:
+            self.fill_path.append((x, y))
+        self.x, self.y = x, y
+
+    def goto(self, x, y = None):
+        if y is None:
+            x, y = x
+        self._go(x, y)
+
+    def forward(self, distance):
+        self._go(self.x + distance * cos(radians(self.heading)),
+                 self.y + distance * sin(radians(self.heading)))
+
+    def backward(self, distance):
+        self.forward(-distance)
+
+    def left(self, angle):
+        self.heading = (self.heading + angle) % 360
+
+    def right(self, angle):
+        self.heading = (self.heading - angle) % 360
+
+    def setheading(self, angle):
+        self.heading = angle % 360
+
+#   Circles and arcs are made of the same straight steps that
+#   turtle uses to draw them.
+    def circle(self, radius, extent = 360):
+        steps = 1 + int(min(11 + abs(radius) / 6.0, 59.0) * abs(extent) / 360)
+        turn = extent / steps
+        length = 2.0 * radius * sin(radians(turn / 2))
+        if radius < 0:
+            length, turn = -length, -turn
+        self.left(turn / 2)
+        for step in range(steps):
+            self.forward(length)
+            self.left(turn)
+        self.left(-turn / 2)
+
+    def penup(self):
+        self._finish_line()
+        self.drawing = False
+
+    def pendown(self):
+        if not self.drawing:
+            self.drawing = True
+            self.line = [(self.x, self.y)]
+
+    pu = penup
+    pd = pendown
+
+    def pencolor(self, colour):
+        if colour != self.pen_colour:
+            self._finish_line()
+            self.pen_colour = colour
+
+    def fillcolor(self, colour):
+        self.fill_colour = colour
+
+    def color(self, colour, fill_colour = None):
+        self.pencolor(colour)
+        self.fillcolor(colour if fill_colour is None else fill_colour)
+
+#   The filled area goes underneath the lines drawn while it is
+#   being filled, so its place is kept when the fill begins.
+    def begin_fill(self):
+        self._finish_line()
+        self.fill_index = len(self.components)
+        self.components.append(None)
+        self.fill_path = [(self.x, self.y)]
+
+    def end_fill(self):
+        if len(self.fill_path) > 2:
+            self.components[self.fill_index] = (tuple(self.fill_path), self.fill_colour, '')
+        self.fill_path = None
+        self._finish_line()
+
+    def finish(self):
+        self._finish_line()
+        return [component for component in self.components if component is not None]
+
+
+#   The following function runs a competitor's drawing function
+#   with the recorder in place of the turtle, starting in the middle
+#   of a cell at [0, 0], and returns the polygons it drew.
+def trace_artwork(draw_artwork):
+    with drawing_with(ShapeRecorder()) as recorder:
+        draw_artwork()
+    return recorder.finish()
+
+
+#   Competitors
+
+#   Each competitor is a record of its name, the nation it
+#   stands for, the function that draws its artwork, the
+#   nation's main and accent colours, which way
+#   (and how far) its label is written from its starting cell
+#   (competitors with no label heading aren't labelled), its
+#   starting cell, its code (its place in the list of
+#   competitors) and the position it was last drawn in.
+#   Everything that draws competitors works from these records,
+#   so the same code serves every competitor.
+
+
+class Competitor:
+
+    def __init__(self, name, nation, artwork, colours, label_heading = None, label_distance = 0,
+                 start = None):
+        self.name = name
+        self.nation = nation
+        self.artwork = artwork
+        self.colours = colours
+        self.label_heading = label_heading
+        self.label_distance = label_distance
+        self.start = start_cells()[name] if start is None else start
+        self.code = None
+        self.position = cell_centre(*self.start)
+
+
+standard_competitors = [Competitor('Competitor A', 'The Water Tribe', draw_artwork_A,
+                                   ('navy', 'slate gray'), 180, 250),
+                        Competitor('Competitor B', 'The Earth Kingdom', draw_artwork_B,
+                                   ('dark goldenrod', 'gold'), 0, 100),
+                        Competitor('Competitor C', 'The Air Nomads', draw_artwork_C,
+                                   ('cornflower blue', 'light slate blue'), 180, 250),
+                        Competitor('Competitor D', 'The Fire Nation', draw_artwork_D,
+                                   ('black', 'firebrick'), 0, 100)]
+competitors = []
+competitor_records = {}
+sprite_artwork = {}
+
+
+#   The following function makes the given records the
+#   competitors in the game, numbering them in order.  The list
+#   and dictionaries are changed in place, so other modules
+#   holding them see the change.
+def use_competitors(records):
+    competitors[:] = records
+    competitor_records.clear()
+    sprite_artwork.clear()
+    for code, competitor in enumerate(competitors):
+        competitor.code = code
+        competitor_records[competitor.name] = competitor
+        sprite_artwork[competitor.name] = competitor.artwork
+    registered_details.clear()
+
+
+#   Each competitor's starting cell, in the form GameState takes.
+def competitor_starts():
+    return {competitor.name: competitor.start for competitor in competitors}
+
+
+#   Fast mode
+
+#   The full artwork takes several polygons, some of them circles
+#   of many points, to stamp, and its detail can't be made out
+#   when the cells are drawn small or the moves go by quickly.
+#   So each competitor can also be drawn plainly in its nation's
+#   colours, as a 'block' filling its cell or as a 'dot' in the
+#   middle of it.  sprite_detail is the level of detail
+#   competitors are drawn at: 'full', 'block' or 'dot'.
+sprite_details = ['full', 'block', 'dot']
+sprite_detail = 'full'
+
+#   Plain shapes are chosen automatically when cells are drawn
+#   at less than detail_zoom times their usual size, or when
+#   more than fast_replay_speed moves are drawn each second.
+detail_zoom = 1 / 3
+fast_replay_speed = 100
+
+
+def choose_detail(fps = None, moves_per_frame = 1, zoom = 1):
+    if zoom < detail_zoom:
+        return 'block'
+    if fps is not None and fps * moves_per_frame > fast_replay_speed:
+        return 'block'
+    return 'full'
+
+
+#   The name a competitor's shape is registered under at each
+#   level of detail.
+def sprite_name(competitor, detail = 'full'):
+    return competitor if detail == 'full' else competitor + ' ' + detail
+
+
+#   The polygon of a competitor's plain shape, around the middle
+#   of a cell at [0, 0], filled with the main colour and
+#   outlined with the accent colour.
+def plain_sprite(competitor, detail):
+    main_colour, accent_colour = competitor.colours
+    if detail == 'block':
+        half_width = cell_width / 2
+        half_height = cell_height / 2
+        outline = ((-half_width, -half_height), (half_width, -half_height),
+                   (half_width, half_height), (-half_width, half_height))
+    else:
+        radius = cell_height / 3
+        outline = tuple((radius * cos(radians(angle)), radius * sin(radians(angle)))
+                        for angle in range(0, 360, 30))
+    return [(outline, main_colour, accent_colour)]
+
+
+#   Each competitor's shapes are registered with turtle, under
+#   the names from sprite_name, the first time a level of detail
+#   is drawn.  Competitors sharing artwork share its tracing.
+registered_details = set()
+
+def register_sprites(detail = 'full'):
+    traced = {}
+    for competitor in competitors:
+        if detail != 'full':
+            polygons = plain_sprite(competitor, detail)
+        else:
+            if competitor.artwork not in traced:
+                traced[competitor.artwork] = trace_artwork(competitor.artwork)
+            polygons = traced[competitor.artwork]
+        sprite = pen.Shape('compound')
+        for polygon, fill_colour, outline_colour in polygons:
+            sprite.addcomponent(polygon, fill_colour, outline_colour)
+        pen.register_shape(sprite_name(competitor.name, detail), sprite)
+    registered_details.add(detail)
+
+use_competitors(standard_competitors)
+
+
+#   Variants of the game
+
+#   The following function sets up a game on a grid of another
+#   odd size, or with other competitors, given as a dictionary
+#   of their names and starting cells (see spread_starts).  The
+#   usual four keep their own artwork and labels; any others are
+#   drawn with the four nations' artwork in turn and aren't
+#   labelled.  Called with no arguments it sets up the usual
+#   game again.
+def configure_game(size = 7, starts = None):
+    global grid_size, canvas_width, canvas_height
+    if size < 5 or size % 2 == 0:
+        raise ValueError('Grid size must be odd and at least 5, not ' + str(size))
+    grid_size = size
+    canvas_height = grid_size * cell_height + y_margin * 2
+    canvas_width = grid_size * cell_width + x_margin * 2
+    if starts is None:
+        starts = start_cells(size)
+    records = []
+    for number, (name, start) in enumerate(starts.items()):
+        usual = standard_competitors[number % len(standard_competitors)]
+        if name == usual.name:
+            records.append(Competitor(name, usual.nation, usual.artwork, usual.colours,
+                                      usual.label_heading, usual.label_distance, start))
+        else:
+            records.append(Competitor(name, usual.nation, usual.artwork, usual.colours,
+                                      start = start))
+    use_competitors(records)
+
+
+#   The grid size and starting cells of a game, those of the game
+#   set up by configure_game unless others are given.  On a grid
+#   of another size the competitors start in the usual corners.
+def game_setup(size = None, starts = None):
+    if size is None:
+        size = grid_size
+    if starts is None:
+        starts = competitor_starts() if size == grid_size else start_cells(size)
+    return size, starts
+
+
+#   The following context manager sets up another game for a while,
+#   as configure_game does, and then puts back the game that was
+#   set up before.  It's used to draw games other than the one on
+#   the screen, such as the offline renders, with the right board,
+#   labels and artwork.
+@contextmanager
+def configured_game(size = None, starts = None):
+    global grid_size, canvas_width, canvas_height
+    size, starts = game_setup(size, starts)
+    if size == grid_size and starts == competitor_starts():
+        yield
+        return
+    usual = (grid_size, canvas_width, canvas_height, list(competitors))
+    configure_game(size, starts)
+    try:
+        yield
+    finally:
+        grid_size, canvas_width, canvas_height, records = usual
+        use_competitors(records)
+
+
+#   The first competitor to reach home is drawn beside the grid,
+#   below the instructions, and the message that nobody did is
+#   written there instead when nobody does.
+def winner_position(size = None):
+    return ((grid_size if size is None else size) * cell_width // 2 + 130, -30)
+
+def no_winner_position(size = None):
+    return ((grid_size if size is None else size) * cell_width // 2 + 10, -30)
+
+
+#   The stamp in each position is remembered, with the competitor
+#   it shows, so that when a competitor is stamped over an earlier
+#   stamp the earlier one is removed instead of being left
+#   underneath.  Only cells that change are drawn: stamping a
+#   competitor over a stamp of itself, as happens when a move is
+#   stopped at the edge of the grid, would change nothing, so it is
+#   skipped.  The function returns whether anything was drawn, and
+#   stamps_drawn counts the stamps actually made.  The competitor
+#   is drawn at the level of detail in sprite_detail unless
+#   another is given.
+stamps = {}
+stamps_drawn = 0
+
+def stamp_competitor(competitor, position, detail = None):
+    global stamps_drawn
+    position = tuple(position)
+    detail = sprite_detail if detail is None else detail
+    old_stamp = stamps.get(position)
+    if old_stamp is not None:
+        if old_stamp[0] == competitor and old_stamp[2] == detail:
+            return False
+        pen.clearstamp(old_stamp[1])
+    if detail not in registered_details:
+        register_sprites(detail)
+    turtle_shape = pen.shape()
+    pen.pu()
+    pen.goto(position)
+#   Compound shapes are stamped the right way up when the turtle
+#   faces north.
+    pen.setheading(90)
+    pen.shape(sprite_name(competitor, detail))
+    stamps[position] = (competitor, pen.stamp(), detail)
+    pen.shape(turtle_shape)
+    stamps_drawn = stamps_drawn + 1
+    return True
+
+
+#   The following function changes the level of detail and
+#   redraws any competitors already drawn at another level.
+def use_detail(detail):
+    global sprite_detail
+    if detail not in sprite_details:
+        raise ValueError('Unknown level of detail ' + repr(detail) + ', expected one of '
+                         + ', '.join(sprite_details))
+    sprite_detail = detail
+    for position, (competitor, stamp, stamp_detail) in list(stamps.items()):
+        if stamp_detail != detail:
+            stamp_competitor(competitor, position, detail)
+
+
+#   The following function draws a competitor in the position
+#   it was last given.
+def draw_competitor(competitor):
+    stamp_competitor(competitor.name, competitor.position)
+
+
+#   The following function is used to draw the first competitor
+#   to reach the middle cell wherever the turtle is, rather than
+#   in a cell of the grid.
+def draw_winner(competitor):
     global first_middle
     first_middle = True
-    pu()
-    setheading(0)
-    colour_background('navy')
-    draw_first_circle('slate gray')
-    color('black')
-    fillcolor('midnight blue')
-    pd()
-    begin_fill()
-    circle(32)
-    end_fill()
-    fillcolor('steel blue')
-    begin_fill()
-    circle(16,180)
-    circle(-16,180)
-    forward(5)
-    right(180)
-    circle(16,180)
-    circle(-16,180)
-    backward(5)
-    end_fill()
-    pu()
-    right(90)
-    forward(45)
-    right(90)
-    backward(10)
-    
-    
-def absolute_draw_B():
-#   These functions are used to draw the
-#   competitors, however, do not use co-ordinates
-#   and can be called in all spaces of the grid.
+    stamp_competitor(competitor.name, pen.position())
 
-#   Therefore, the following functions are used
-#   to draw the first competitor to reach the middle
-#   cell.
 
-    global first_middle
-    first_middle = True
-    pu()
-    setheading(0)
-    colour_background('dark goldenrod')
-    color('gold')
-    draw_first_circle('gold')
-    pu()
-    fillcolor('dark green')
-    left(90)
-    forward(45)
-    left(90)
-    forward(45)
-    left(180)
-    forward(10)
-    setheading(0)
-    pd()
-    begin_fill()
-    circle(35)
-    end_fill()
-    pu()
-    color('black')
-    fillcolor('dark goldenrod')
-    setheading(90)
-    forward(33)
-    right(90)
-    begin_fill()
-    forward(8.75)
-    pd()
-    right(90)
-    forward(8.75)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
-    right(90)
-    forward(17.5)
-    pu()
-    end_fill()
-    setheading(90)
-    forward(11)
-    left(90)
-    forward(9)
-    setheading(90)
-    
-    
+#   These functions draw one particular competitor in the last
+#   defined position, or wherever the turtle is.
+def draw_competitor_A():
+    draw_competitor(competitors[0])
 
-def absolute_draw_C():
-#   These functions are used to draw the
-#   competitors, however, do not use co-ordinates
-#   and can be called in all spaces of the grid.
+def draw_competitor_B():
+    draw_competitor(competitors[1])
 
-#   Therefore, the following functions are used
-#   to draw the first competitor to reach the middle
-#   cell.
+def draw_competitor_C():
+    draw_competitor(competitors[2])
 
-    global first_middle
-    first_middle = True
-    pu()
-    setheading(0)
-    colour_background('cornflower blue')
-    draw_first_circle('light slate blue')
-    color('black')
-    pu()
-    forward(cell_height/2)
-    left(90)
-    forward(45)
-    setheading(0)
-    fillcolor('royal blue')
-    begin_fill()
-    pd()
-    circle(-30, 180)
-    circle(-15, 180)
-    circle(-10, 90)
-    setheading(90)
-    circle(17,180)
-    circle(35,90)
-    circle(33,90)
-    setheading(90)
-    circle(40,90)
-    end_fill()
-    pu()
-    setheading(180)
-    forward(4)
-    setheading(270)
-    forward(43)
-    setheading(90)
-    
+def draw_competitor_D():
+    draw_competitor(competitors[3])
+
+
+def absolute_draw_A():
+    draw_winner(competitors[0])
+
+def absolute_draw_B():
+    draw_winner(competitors[1])
+
+def absolute_draw_C():
+    draw_winner(competitors[2])
 
 def absolute_draw_D():
-#   These functions are used to draw the
-#   competitors, however, do not use co-ordinates
-#   and can be called in all spaces of the grid.
+    draw_winner(competitors[3])
+
+#   Rendering
+
+#   The render scheduler controls when changes appear on the
+#   screen.  Turtle's automatic screen updates are turned off,
+#   and instead a frame's worth of moves is drawn and then shown
+#   with a single update.  Frames are either drawn back to back as
+#   fast as possible (fps = None) or by timer events at a target
+#   number of frames per second.
+
+
+class RenderScheduler:
+
+    def __init__(self, fps = None, moves_per_frame = 1):
+        if fps is not None and not fps > 0:
+            raise ValueError('Frames per second must be more than 0, not ' + str(fps))
+        if moves_per_frame < 1:
+            raise ValueError('At least one move must be drawn in each frame, not '
+                             + str(moves_per_frame))
+        self.fps = fps
+        self.moves_per_frame = moves_per_frame
+        self.moves = iter(())
+        self.frames = 0
+        self.finished = False
+        self.stamps_shown = None
+
+#   Draw the moves from an iterator which draws one move each
+#   time it is advanced, such as the one from draw_moves.
+    def play(self, moves):
+        self.moves = iter(moves)
+        self.finished = False
+        pen.tracer(False)
+        if self.fps is None:
+            while not self.finished:
+                self.draw_frame()
+        else:
+            self._next_frame()
+
+#   Draw the next frame's moves and then show them.  A frame in
+#   which no moves changed any cells is not shown again, except at
+#   the end of the game, when the result may have been written.
+    def draw_frame(self):
+        drawn = sum(1 for move in islice(self.moves, self.moves_per_frame))
+        self.frames = self.frames + 1
+        self.finished = drawn < self.moves_per_frame
+        if stamps_drawn != self.stamps_shown or self.finished:
+            refresh_screen()
+            self.stamps_shown = stamps_drawn
+
+#   Draw a frame and ask for the next one to be drawn when it is
+#   due, allowing for the time this frame took to draw.
+    def _next_frame(self):
+        frame_start = time.perf_counter()
+        self.draw_frame()
+        if not self.finished:
+            elapsed = time.perf_counter() - frame_start
+            delay = max(0, int(1000 * (1 / self.fps - elapsed)))
+            pen.ontimer(self._next_frame, delay)
+
+
+#   Show everything drawn since the last refresh.
+def refresh_screen():
+    pen.update()
 
-#   Therefore, the following functions are used
-#   to draw the first competitor to reach the middle
-#   cell.
 
-    global first_middle
-    first_middle = True
-    pu()
-    setheading(0)
-    colour_background('black')
-    draw_first_circle('firebrick')
-    left(90)
-    forward(45)
-    right(90)
-    forward(40)
-    fillcolor('black')
-    begin_fill()
-    pd()
-    setheading(255)
-    forward(30)
-    circle(10, 90)
-    setheading(-215)
-    forward(15)
-    circle(-10,90)
-    forward(10)
-    setheading(230)
-    forward(20)
-    circle(20,80)
-    setheading(280)
-    circle(30,20)
-    circle(25,150)
-    setheading(90)
-    circle(50,20)
-    circle(50,20)
-    forward(25)
-    end_fill()
-    pu()
-    setheading(270)
-    forward(42.5)
-    
 ####################################################
 #   Move processing
 
-#   The draw functions are used to draw each competitor
-#   in their starting positions. They call upon the
-#   positions that were presented previously.
-
-#   The variable presenting their new positions are used
-#   to continuously update where the next competitor
+#   The position in each competitor's record is used
+#   to continuously update where the competitor
 #   should be drawn. 
 
-draw_competitor_A()
-new_A_position = list((xcor(), ycor())) 
-draw_competitor_B()
-new_B_position = list((xcor(), ycor()))
-draw_competitor_C()
-new_C_position = list((xcor(), ycor()))
-draw_competitor_D()
-new_D_position = list((xcor(), ycor()))
+#   The function reset game clears away the competitors from
+#   an earlier game, leaving the board where it is, and draws
+#   them in their starting positions ready for the next game.
+
+def reset_game():
+    global first_middle
+    pen.clear()
+    stamps.clear()
+    first_middle = False
+    for competitor in competitors:
+        competitor.position = cell_centre(*competitor.start)
+        draw_competitor(competitor)
+
 
-#   The function process moves will be used to interpret
+#   The function draw moves will be used to interpret
 #   the given dataset into movements that can be used.
+#   It applies each move to the game state and draws the
+#   change, pausing after each move so that the render
+#   scheduler can decide when to show it.  With stop_at_home
+#   set, it stops once someone has reached home, without
+#   reading any more moves.
+
+def draw_moves(state, dataset, stop_at_home = False):
+#   The game engine decides where each competitor ends up
+#   and who reaches home first; the code below only draws
+#   the changes it reports.
+
+#   A for loop will allow the dataset to be read.  Each move's
+#   strings are turned into small integer codes by looking them
+#   up once, and the code then picks out the competitor's
+#   record, so the same code draws every competitor's moves.
+    codes = state.codes
+    columns = state.columns
+    rows = state.rows
+    if stop_at_home and state.winner is not None:
+        dataset = ()
+    for competitor_name, direction in dataset:
+        code = codes[competitor_name]
+        state.apply_code(code * 4 + direction_codes[direction])
+        competitor = competitors[code]
+    #   The competitor's position is updated to the middle
+    #   of its new cell, ready for it to be drawn.
+        competitor.position = cell_centre(columns[code], rows[code])
+    #   The winner is drawn outside the grid on the move
+    #   that takes them home.
+        if state.home_move == state.move_count - 1:
+            pen.pu()
+            pen.goto(*winner_position())
+            draw_winner(competitor)
+    #   Finally, the competitor is drawn.
+        draw_competitor(competitor)
+
+        yield competitor_name
+        if stop_at_home and state.winner is not None:
+            break
 
-def process_moves(dataset):
-#   The global variables are used to update the positions
-#   of each competitor outside of this function.
-    global new_A_position
-    global new_B_position
-    global new_C_position
-    global new_D_position
-    global first_middle
-    
-#   A data counter is used to iterate each component
-#   that is provided in the data set.
-
-    data_counter = 0
-
-#   A for loop will allow the dataset to be read.
-    for move in dataset:
-    #   If the first value in the dataset reads Competitor A,
-    #   then this if statement will call the draw Competitor A
-    #   function. 
-        if dataset[data_counter][0] == 'Competitor A':
-            #   If the second value in the dataset reads
-            #   Right, then the if statement will call upon
-            #   the move right function. 
-            if dataset[data_counter][1] == ('Right'):
-               goto(new_A_position)
-               move_right()
-               #    After moving into the new position,
-               #    this position is recorded and saved
-               #    for the next movement.             
-               new_A_position = list((xcor(), ycor()))
-                     
-               
-            elif dataset[data_counter][1] == ('Left'):
-            #      This is repeated for the left direction. 
-                   goto(new_A_position)
-                   move_left()
-                   new_A_position = list((xcor(), ycor()))
-                   
-                   
-            elif dataset[data_counter][1] == ('Up'):
-            #      This is repeated for the up direction. 
-                   goto(new_A_position)
-                   move_up()
-                   new_A_position = list((xcor(), ycor()))
-                   
-                  
-            elif dataset[data_counter][1] == ('Down'):
-            #      This is repeated for the down direction. 
-                   goto(new_A_position)
-                   move_down()
-                   new_A_position = list((xcor(), ycor()))
-                   
-            #   If the new position that this competitor moves into
-            #   happens to be within the bounds of the middle cell,
-            #   while no other competitor has taken over the middle cell
-            #   before this, then the turtle will move outside the grid
-            #   and draw this competitor.
-            if (new_A_position)[0] < (cell_width/2) and (new_A_position)[0] > (-cell_width/2) and (new_A_position)[1] < (cell_height/2) and (new_A_position)[1] > (-cell_height/2) and first_middle == False:                
-                   pu()
-                   goto(550, -30)
-                   absolute_draw_A()                   
-
-        #   Finally, the competitor is drawn. 
-            draw_competitor_A()
-            
-        if dataset[data_counter][0] == 'Competitor B':
-        #   This is repeated for Competitor B
-            if dataset[data_counter][1] == ('Right'):
-                goto(new_B_position)
-                move_right()
-                new_B_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Left'):
-                goto(new_B_position)
-                move_left()
-                new_B_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Up'):
-                goto(new_B_position)
-                move_up()
-                new_B_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Down'):
-                goto(new_B_position)
-                new_B_position = list((xcor(), ycor()))
-                
-            if (new_B_position)[0] < (cell_width/2) and (new_B_position)[0] > (-cell_width/2) and (new_B_position)[1] < (cell_height/2) and (new_B_position)[1] > (-cell_height/2) and first_middle == False:
-                pu()
-                goto(550, -30)
-                absolute_draw_B()   
-                
-            draw_competitor_B()
-            
-        if dataset[data_counter][0] == 'Competitor C':
-        #   This is repeated for Competitor C
-            if dataset[data_counter][1] == ('Right'):
-                goto(new_C_position)
-                move_right()
-                new_C_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Left'):
-                goto(new_C_position)
-                move_left()
-                new_C_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Up'):
-                goto(new_C_position)
-                move_up()
-                new_C_position = list((xcor(), ycor()))
-                
-            elif dataset[data_counter][1] == ('Down'):
-                goto(new_C_position)
-                move_down()
-                new_C_position = list((xcor(), ycor()))
-                
-            if (new_C_position)[0] < (cell_width/2) and (new_C_position)[0] > (-cell_width/2) and (new_C_position)[1] < (cell_height/2) and (new_C_position)[1] > (-cell_height/2) and first_middle == False:
-                pu()
-                goto(550, -30)
-                absolute_draw_C()
-            
-            draw_competitor_C()
-        
-        if dataset[data_counter][0] == 'Competitor D':
-        #   This is repeated for Competitor D
-            if dataset[data_counter][1] == ('Right'):
-                goto(new_D_position)
-                move_right()
-                new_D_position = list((xcor(), ycor()))
-                
-                
-            elif dataset[data_counter][1] == ('Left'):
-                goto(new_D_position)
-                move_left()
-                new_D_position = list((xcor(), ycor()))
-                
-                
-            elif dataset[data_counter][1] == ('Up'):
-                goto(new_D_position)
-                move_up()
-                new_D_position = list((xcor(), ycor()))
-                
-                
-            elif dataset[data_counter][1] == ('Down'):
-                goto(new_D_position)
-                move_down()
-                new_D_position = list((xcor(), ycor()))
-                                
-            if (new_D_position)[0] < (cell_width/2) and (new_D_position)[0] > (-cell_width/2) and (new_D_position)[1] < (cell_height/2) and (new_D_position)[1] > (-cell_height/2) and first_middle == False:
-                pu()
-                goto(550, -30)
-                absolute_draw_D()
-            draw_competitor_D()
-    #   The data counter is updated each time this for loop re-iterates
-    #   to move on to the next list in the dataset. 
-        data_counter = data_counter + 1
     #   The following code presents that after all lists in the dataset
     #   has been iterated, if none have made it to the middle cell,
     #   then display this on the right of the grid. 
-    if first_middle == False:
-        goto(430, -30)
-        write('No competitors reached home', font = ('Arial', 15))
-        hideturtle()
+    if state.winner is None:
+        pen.goto(*no_winner_position())
+        pen.write('No competitors reached home', font = ('Arial', 15))
+        pen.hideturtle()
+
+
+#   The function fast forward plays moves without drawing
+#   them, remembering only the last competitor to visit each
+#   cell, and then draws the board as those moves left it: the
+#   visited cells and the winner, if there is one.  However
+#   many moves are skipped, this costs one stamp per visited
+#   cell.
+
+def fast_forward(state, dataset, stop_at_home = False):
+    codes = state.codes
+    columns = state.columns
+    rows = state.rows
+    claims = {}
+    for competitor_name, direction in dataset:
+        code = codes[competitor_name]
+        state.apply_code(code * 4 + direction_codes[direction])
+        claims[columns[code], rows[code]] = code
+        if stop_at_home and state.winner is not None:
+            break
+    for (column, row), code in claims.items():
+        stamp_competitor(competitors[code].name, cell_centre(column, row))
+    for competitor in competitors:
+        competitor.position = cell_centre(columns[competitor.code], rows[competitor.code])
+    if state.winner is not None:
+        pen.pu()
+        pen.goto(*winner_position())
+        draw_winner(competitor_records[state.winner])
+
+
+#   The function process moves draws a whole game and returns
+#   its result.  The dataset can be any iterable of moves, such
+#   as a list or the moves read from a file by open_moves.  By
+#   default every move is drawn as soon as it is read, so a
+#   stream of moves is drawn as it arrives without being kept
+#   in memory.  Giving a number of frames per second animates
+#   the game instead, with the frames drawn by timer events as
+#   the moves arrive; the event loop then runs, keeping the
+#   window open, and the result is returned once it ends.
+#   The competitors are drawn at the given level of detail (see
+#   Fast mode), or with detail = 'auto' at one chosen to suit the
+#   speed of the replay; by default the current one is kept.
+
+#   Three options skip drawing that isn't wanted:
+#     stop_at_home   stop the game, and the drawing, as soon as
+#                    someone reaches home
+#     start_move     play the moves before this one without
+#                    drawing them, and draw from there on
+#     final_board    play every move without drawing it, and
+#                    draw only the board they leave
+#   They can be combined, for example to draw only the board as
+#   it was when the winner reached home.
+
+def process_moves(dataset, fps = None, moves_per_frame = 1, detail = None,
+                  stop_at_home = False, start_move = 0, final_board = False):
+    if start_move < 0:
+        raise ValueError('The first move drawn must be move 0 or later, not ' + str(start_move))
+    if detail == 'auto':
+        detail = choose_detail(fps, moves_per_frame)
+    if detail is not None:
+        use_detail(detail)
+    state = GameState(grid_size, competitor_starts())
+    moves = iter(dataset)
+    if final_board or start_move:
+        fast_forward(state, moves if final_board else islice(moves, start_move), stop_at_home)
+    scheduler = RenderScheduler(fps, moves_per_frame)
+    scheduler.play(draw_moves(state, moves, stop_at_home))
+    if fps is not None:
+        pen.done()
+    return state.result()
       
 #
 #--------------------------------------------------------------------#
 
 
 
-#-----Main Program---------------------------------------------------#
+#-----Timing and Profiling-------------------------------------------#
 #
+# Timing shows where the time goes while a game is drawn.  When it is
+# turned on, with enable_timing() or by setting the environment
+# variable LAND_GRAB_TIMING=1, the functions for each phase of a game
+# are replaced by timed versions, which add up the time spent in each
+# phase, and the number of times it was entered, in 'stats':
+#
+#   canvas setup   create_drawing_canvas
+#   placement      reset_game, drawing the competitors at the start
+#   simulation     GameState.apply_code, for every move
+#   drawing        draw_competitor, for every move
+#   sprites        register_sprites, tracing the artwork the first
+#                  time a competitor is drawn
+#   winner         draw_winner, drawing the winner when the
+#                  first competitor reaches home (first_middle)
+#   refresh        refresh_screen, showing each frame
+#   move loop      the rest of process_moves
+#
+# Phases that run inside another phase are not counted in it as well,
+# so the times add up to the total.  When timing is off the usual
+# functions are used and it costs nothing.
+#
+# profile_call() runs a function under cProfile and prints the
+# functions that took the most time.  main() does this with the
+# --profile option or the environment variable LAND_GRAB_PROFILE=1.
+
+class PhaseStats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.seconds = {}
+        self.calls = {}
+        self.running = []
+
+#   Start timing a phase, pausing the one it is part of.
+    def start(self, phase):
+        now = time.perf_counter()
+        if self.running:
+            outer = self.running[-1]
+            self.seconds[outer[0]] = self.seconds.get(outer[0], 0) + now - outer[1]
+        self.running.append([phase, now])
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+#   Stop timing the latest phase and carry on with the one it was
+#   part of.
+    def stop(self):
+        now = time.perf_counter()
+        phase, started = self.running.pop()
+        self.seconds[phase] = self.seconds.get(phase, 0) + now - started
+        if self.running:
+            self.running[-1][1] = now
+
+    def total(self):
+        return sum(self.seconds.values())
+
+    def report(self):
+        lines = ['{:<16}{:>10}{:>12}{:>8}{:>14}'.format('Phase', 'Calls', 'Seconds',
+                                                        'Share', 'Per call (us)')]
+        total = max(self.total(), 1e-12)
+        for phase in sorted(self.seconds, key = self.seconds.get, reverse = True):
+            seconds, calls = self.seconds[phase], self.calls[phase]
+            lines.append('{:<16}{:>10}{:>12.4f}{:>7.1f}%{:>14.1f}'.format(
+                phase, calls, seconds, 100 * seconds / total, 1e6 * seconds / calls))
+        return '\n'.join(lines)
+
+
+stats = PhaseStats()
+
+timed_phases = {'create_drawing_canvas': 'canvas setup',
+                'reset_game': 'placement',
+                'draw_competitor': 'drawing',
+                'register_sprites': 'sprites',
+                'draw_winner': 'winner',
+                'refresh_screen': 'refresh',
+                'process_moves': 'move loop'}
+
+#   The usual functions, kept while the timed ones are in use
+untimed_functions = {}
+
+
+def timed(function, phase):
+    def timed_function(*args, **kwargs):
+        stats.start(phase)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.stop()
+    timed_function.__name__ = function.__name__
+    return timed_function
+
+
+# Turn timing on (or off) for the phases above
+def enable_timing(enabled = True):
+    module_globals = globals()
+    if enabled and not untimed_functions:
+        for name, phase in timed_phases.items():
+            untimed_functions[name] = module_globals[name]
+            module_globals[name] = timed(module_globals[name], phase)
+        untimed_functions['apply_code'] = GameState.apply_code
+        GameState.apply_code = timed(GameState.apply_code, 'simulation')
+    elif not enabled and untimed_functions:
+        GameState.apply_code = untimed_functions.pop('apply_code')
+        module_globals.update(untimed_functions)
+        untimed_functions.clear()
+
+
+# Run function(*args) under cProfile, print the 'limit' functions
+# that took the most time (by 'sort', as for pstats) and return the
+# function's result
+def profile_call(function, *args, sort = 'cumulative', limit = 25):
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args)
+    finally:
+        pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
+
+
+if os.environ.get('LAND_GRAB_TIMING', '') not in ('', '0'):
+    enable_timing()
 
-# Set up the drawing canvas
-# ***** You can change the background and line colours, choose
-# ***** whether or not to label the axes, etc, by providing
-# ***** arguments to this function call
-create_drawing_canvas()
-
+#
+#--------------------------------------------------------------------#
 
-# Control the drawing speed
-# ***** Change the following argument if you want to adjust
-# ***** the drawing speed
-speed('fastest')
 
 
+#-----Main Program---------------------------------------------------#
+#
 
-# Give the drawing canvas a title
-# ***** Replace this title with a description of your solution's
-# ***** theme and its competitors
-title('ATLA: Four Nations')
+# An argparse type for options that count something there must be
+# at least one of, such as --moves-per-frame
+def at_least_one(text):
+    number = int(text)
+    if number < 1:
+        raise argparse.ArgumentTypeError('must be at least 1, not ' + text)
+    return number
+
+
+# An argparse type for options that can be 0 but not negative, such
+# as --start-move
+def at_least_zero(text):
+    number = int(text)
+    if number < 0:
+        raise argparse.ArgumentTypeError('must be at least 0, not ' + text)
+    return number
+
+
+# An argparse type for rates, such as --fps, which must be more than 0
+def more_than_zero(text):
+    number = float(text)
+    if not number > 0:
+        raise argparse.ArgumentTypeError('must be more than 0, not ' + text)
+    return number
+
+
+def main(args = None):
+
+    # Decide which moves to play.  By default they are random, but
+    # they can be read from a file or from the standard input
+    parser = argparse.ArgumentParser(description = 'Play a game of Land Grab.')
+    parser.add_argument('--moves', metavar = 'FILE',
+                        help = "read the moves from FILE, one per line ('-' for standard input)")
+    parser.add_argument('--archive', metavar = 'FILE',
+                        help = 'replay a game from a replay archive made by replay_archive.py')
+    parser.add_argument('--game', type = int, default = 0,
+                        help = 'number of the game to replay from the archive (default 0)')
+    parser.add_argument('--seed', type = int, default = None,
+                        help = 'seed for the random moves')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'maximum number of rounds of random moves (default 35)')
+    parser.add_argument('--grid-size', type = int, default = 7,
+                        help = 'width and height of the grid, an odd number of cells (default 7)')
+    parser.add_argument('--competitors', type = int, default = 4,
+                        help = 'number of competitors, spread around the edge of the grid '
+                               '(default 4)')
+    parser.add_argument('--headless', action = 'store_true',
+                        help = 'play the game without drawing it and print the result')
+    parser.add_argument('--fps', type = more_than_zero, default = None,
+                        help = 'animate the game at this many frames per second')
+    parser.add_argument('--moves-per-frame', type = at_least_one, default = 1,
+                        help = 'number of moves drawn in each frame (default 1)')
+    parser.add_argument('--stop-at-home', action = 'store_true',
+                        help = 'stop the game as soon as someone reaches home')
+    parser.add_argument('--start-move', type = at_least_zero, default = 0, metavar = 'K',
+                        help = 'play the first K moves without drawing them, then draw the rest')
+    parser.add_argument('--final-board', action = 'store_true',
+                        help = 'play every move without drawing it and draw only the final board')
+    parser.add_argument('--detail', choices = ['auto'] + sprite_details, default = 'auto',
+                        help = "draw the competitors' full artwork, or plain blocks or dots in "
+                               "their colours (by default, plain blocks for fast replays)")
+    parser.add_argument('--backend', choices = ['turtle', 'null', 'recording'], default = 'turtle',
+                        help = "draw with turtle (the default), draw nothing ('null') or draw "
+                               "nothing and count the drawing calls ('recording')")
+    parser.add_argument('--timing', action = 'store_true',
+                        help = 'time each phase of drawing the game and print the times')
+    parser.add_argument('--profile', action = 'store_true',
+                        help = 'draw the game under cProfile and print the slowest functions')
+    options = parser.parse_args(args)
+    if options.grid_size != grid_size or options.competitors != len(competitors):
+        configure_game(options.grid_size, spread_starts(options.competitors, options.grid_size))
+    if options.archive is not None:
+        from replay_archive import ReplayArchive
+        with ReplayArchive(options.archive) as archive:
+            moves = archive.moves(options.game)
+    elif options.moves is not None:
+        moves = open_moves(options.moves)
+    else:
+        moves = random_moves(options.seed, options.max_rounds,
+                             competitors = list(competitor_records))
+
+    # Without drawing, report the winner as soon as they get home
+    if options.headless:
+        state = GameState(grid_size, competitor_starts())
+        for competitor, direction in moves:
+            state.apply_move(competitor, direction)
+            if state.home_move == state.move_count - 1:
+                print(competitor, 'reached home on move', state.home_move + 1)
+                sys.stdout.flush()
+                if options.stop_at_home:
+                    break
+        if state.winner is None:
+            print('No competitors reached home after', state.move_count, 'moves')
+        return state.result()
+
+    # Draw the game, timing its phases or running it under the
+    # profiler if asked to
+    if options.timing:
+        enable_timing()
+    if options.profile or os.environ.get('LAND_GRAB_PROFILE', '') not in ('', '0'):
+        result = profile_call(draw_game, moves, options)
+    else:
+        result = draw_game(moves, options)
+    if untimed_functions:
+        print()
+        print(stats.report())
+    return result
+
+
+def draw_game(moves, options):
+
+    # Get the turtle (or another backend) ready and draw as quickly
+    # as possible
+    if options.backend == 'turtle':
+        load_turtle()
+    else:
+        use_backend(options.backend)
+    pen.tracer(False)
+
+    # Set up the drawing canvas, with the competitors' names
+    # ***** You can change the background and line colours, choose
+    # ***** whether or not to label the axes, etc, by providing
+    # ***** arguments to this function call
+    create_drawing_canvas()
+
+    # Draw the competitors in their starting positions
+    reset_game()
+
+    # Control the drawing speed
+    # ***** Change the following argument if you want to adjust
+    # ***** the drawing speed
+    pen.speed('fastest')
+
+    # Give the drawing canvas a title
+    # ***** Replace this title with a description of your solution's
+    # ***** theme and its competitors
+    pen.title('ATLA: Four Nations')
+
+    # Draw the moves.  Moves read from a file or stream are drawn
+    # as they arrive.  Animated games are drawn by timer events, so
+    # the window is kept open while they play.
+    result = process_moves(moves, fps = options.fps,
+                           moves_per_frame = options.moves_per_frame, detail = options.detail,
+                           stop_at_home = options.stop_at_home, start_move = options.start_move,
+                           final_board = options.final_board)
+
+    # Report how much drawing was done
+    if options.backend == 'recording':
+        print()
+        print(pen.total(), 'drawing calls:')
+        for name, count in pen.calls.most_common():
+            print('{:>12}  {}'.format(count, name))
 
+    # Exit gracefully
+    # ***** Change the default argument to False if you want the
+    # ***** cursor (turtle) to remain visible at the end of the
+    # ***** program as a debugging aid.
+    #release_drawing_canvas()
+    return result
 
-process_moves(random_moves()) 
 
-   
-# Exit gracefully
-# ***** Change the default argument to False if you want the
-# ***** cursor (turtle) to remain visible at the end of the
-# ***** program as a debugging aid.
-#release_drawing_canvas()
+if __name__ == '__main__':
+    main()
 
 #
 #--------------------------------------------------------------------#
@@ -0,0 +1,79 @@
+#-----Compact Move Format---------------------------------------------#
+#
+# A packed binary format for Land Grab moves.  Each move is given a
+# 4-bit code, competitor * 4 + direction, where the competitor and
+# direction are positions in land_grab.competitor_names and
+# land_grab.direction_names, so ['Competitor C', 'Up'] is 2 * 4 + 2.
+# Two moves are packed into each byte, the first in the high four
+# bits, so a move takes half a byte instead of the 100 or more bytes
+# of a two-string list.  A game with an odd number of moves ends with
+# an unused low half, which is why unpacking needs the move count.
+#
+# Codes can also be kept one per byte (as bytes or array('B')), which
+# is the form the other tools work with.  Conversions between the
+# forms are done with translation tables and slicing, so packing and
+# unpacking large logs is done by C loops rather than per move.
+
+import land_grab
+
+codes_per_byte = 2
+code_bits = 4
+
+# Every move in code order, as (competitor, direction) tuples that are
+# shared by every decoded move with that code
+code_moves = [(competitor, direction)
+              for competitor in land_grab.competitor_names
+              for direction in land_grab.direction_names]
+move_code_table = {move: code for code, move in enumerate(code_moves)}
+
+# Translation tables between packed bytes and codes
+_high_codes = bytes(byte >> code_bits for byte in range(256))
+_low_codes = bytes(byte & ((1 << code_bits) - 1) for byte in range(256))
+_shifted_codes = bytes((byte << code_bits) & 0xFF for byte in range(256))
+
+
+# Turn a dataset in the ['Competitor A', 'Left'] format into codes,
+# one per byte
+def encode_codes(dataset):
+    codes = move_code_table
+    return bytes([codes[competitor, direction] for competitor, direction in dataset])
+
+
+# Turn codes back into moves.  The moves are shared tuples, which the
+# game engine and process_moves accept just like two-element lists.
+def decode_codes(codes):
+    return [code_moves[code] for code in codes]
+
+
+# Pack codes (one per byte) two to a byte
+def pack_codes(codes):
+    codes = bytes(codes)
+    if len(codes) % 2:
+        codes = codes + b'\0'
+    high = codes[0::2].translate(_shifted_codes)
+    low = codes[1::2]
+    return (int.from_bytes(high, 'big') | int.from_bytes(low, 'big')).to_bytes(len(high), 'big')
+
+
+# Unpack 'count' codes (by default two for every byte), one per byte
+def unpack_codes(packed, count = None):
+    if count is None:
+        count = len(packed) * codes_per_byte
+    packed = bytes(packed[:(count + 1) // codes_per_byte])
+    codes = bytearray(len(packed) * codes_per_byte)
+    codes[0::2] = packed.translate(_high_codes)
+    codes[1::2] = packed.translate(_low_codes)
+    return bytes(codes[:count])
+
+
+# Pack a dataset in the ['Competitor A', 'Left'] format
+def encode_moves(dataset):
+    return pack_codes(encode_codes(dataset))
+
+
+# Unpack 'count' moves from packed bytes
+def decode_moves(packed, count = None):
+    return decode_codes(unpack_codes(packed, count))
+
+#
+#--------------------------------------------------------------------#
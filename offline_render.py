@@ -0,0 +1,502 @@
+#-----Offline Renderer-----------------------------------------------#
+#
+# Draws pictures of Land Grab games as SVG or PNG files, without
+# turtle or Tk, so they can be made on servers with no display.
+#
+# The board is drawn by running the usual board drawing code
+# (draw_board_layer and label_competitors) with a BoardRecorder in
+# place of the turtle, which records the lines, dots and text it
+# would have drawn.  The competitors are the polygons traced from
+# their artwork for the turtle sprites (see trace_artwork), so the
+# pictures match the ones drawn on screen.
+#
+# A picture shows a game as it looks once all its moves have been
+# drawn: every cell a competitor has visited holds the last
+# competitor to visit it, and the winner (if any) is drawn beside
+# the grid.
+#
+# SVG files are written as text.  PNG files are drawn by a small
+# rasteriser written in Python, which fills polygons a row at a time
+# (without anti-aliasing) and leaves out the text.  The board and
+# each competitor are only rasterised once for each grid size and
+# scale, and after that a picture is made by copying rows of pixels,
+# so small thumbnails take a few milliseconds each.
+#
+# Run it from the command line, for example:
+#
+#     python offline_render.py game.svg --seed 3
+#     python offline_render.py thumbs/game.png --games 1000 --scale 0.25
+
+import argparse
+import os
+import struct
+import zlib
+from math import ceil, cos, radians, sin
+
+import land_grab
+
+
+# The colours used by the drawings, as Tk defines them
+colour_values = {'black': (0, 0, 0),
+                 'white': (255, 255, 255),
+                 'grey': (190, 190, 190),
+                 'gray': (190, 190, 190),
+                 'light grey': (211, 211, 211),
+                 'light gray': (211, 211, 211),
+                 'dark grey': (169, 169, 169),
+                 'dark gray': (169, 169, 169),
+                 'red': (255, 0, 0),
+                 'green': (0, 255, 0),
+                 'blue': (0, 0, 255),
+                 'yellow': (255, 255, 0),
+                 'orange': (255, 165, 0),
+                 'purple': (160, 32, 240),
+                 'cornflower blue': (100, 149, 237),
+                 'dark goldenrod': (184, 134, 11),
+                 'dark green': (0, 100, 0),
+                 'firebrick': (178, 34, 34),
+                 'gold': (255, 215, 0),
+                 'light slate blue': (132, 112, 255),
+                 'midnight blue': (25, 25, 112),
+                 'navy': (0, 0, 128),
+                 'royal blue': (65, 105, 225),
+                 'slate gray': (112, 128, 144),
+                 'slate grey': (112, 128, 144),
+                 'steel blue': (70, 130, 180)}
+
+
+# The red, green and blue values of a colour name or '#rrggbb' string
+def colour_rgb(colour):
+    if colour.startswith('#') and len(colour) == 7:
+        return tuple(int(colour[start:start + 2], 16) for start in (1, 3, 5))
+    if colour.lower() not in colour_values:
+        raise ValueError('Unknown colour ' + repr(colour))
+    return colour_values[colour.lower()]
+
+
+def colour_hex(colour):
+    return '#{:02x}{:02x}{:02x}'.format(*colour_rgb(colour))
+
+
+# Everything in a picture is kept as a list of shapes, each a tuple
+# of (points, fill colour, line colour, line width).  A shape with a
+# fill colour is a filled polygon and a shape with a line colour is a
+# line through its points; the other colour is ''.  Text is kept
+# separately as (x, y, text, align, font, colour).
+
+class BoardRecorder(land_grab.ShapeRecorder):
+#   A ShapeRecorder which also records the width of each line, dots
+#   and text, for the drawing functions used by the board.
+
+    def __init__(self):
+        land_grab.ShapeRecorder.__init__(self)
+        self.line_width = 1
+        self.texts = []
+
+    def _finish_line(self):
+        if self.drawing and len(self.line) > 1:
+            self.components.append((tuple(self.line), '', self.pen_colour, self.line_width))
+        self.line = [(self.x, self.y)]
+
+    def width(self, line_width):
+        self._finish_line()
+        self.line_width = line_width
+
+    def home(self):
+        self.goto(0, 0)
+        self.setheading(0)
+
+    def dot(self, size, colour = None):
+        self.components.append((circle_points(self.x, self.y, size / 2),
+                                colour or self.pen_colour, '', 0))
+
+    def write(self, text, move = False, align = 'left', font = ('Arial', 8, 'normal')):
+        self.texts.append((self.x, self.y, str(text), align, font, self.pen_colour))
+
+    def hideturtle(self):
+        pass
+
+    def finish(self):
+        self._finish_line()
+        return [component if len(component) == 4 else component + (0,)
+                for component in self.components if component is not None]
+
+
+def circle_points(x, y, radius, steps = 36):
+    return tuple((x + radius * cos(radians(angle * 360 / steps)),
+                  y + radius * sin(radians(angle * 360 / steps)))
+                 for angle in range(steps))
+
+
+# The shapes and text of the board for a grid size, with the options
+# of create_drawing_canvas.  The grid size and starting cells are
+# those of the game set up in land_grab unless others are given
+# (see land_grab.game_setup), and the competitors are labelled at
+# their own starting cells.
+def board_drawing(size = None, starts = None, show_instructions = True,
+                  label_locations = True, bg_colour = 'light grey', line_colour = 'grey'):
+    with land_grab.configured_game(size, starts), \
+            land_grab.drawing_with(BoardRecorder()) as recorder:
+        land_grab.draw_board_layer(show_instructions, label_locations, bg_colour, line_colour)
+        land_grab.label_competitors()
+    return recorder.finish(), recorder.texts
+
+
+# The shapes of each competitor of the game set up in land_grab,
+# around the middle of a cell at [0, 0].  Lines are closed, as they
+# are in the turtle sprites.  The shapes are kept for each artwork,
+# since competitors of different games can share a name but not
+# their artwork.
+sprite_shapes = {}
+
+def competitor_shapes(competitor):
+    artwork = land_grab.sprite_artwork[competitor]
+    if artwork not in sprite_shapes:
+        shapes = []
+        for polygon, fill_colour, outline_colour in land_grab.trace_artwork(artwork):
+            if outline_colour:
+                shapes.append((polygon + polygon[:1], '', outline_colour, 1))
+            else:
+                shapes.append((polygon, fill_colour, '', 0))
+        sprite_shapes[artwork] = shapes
+    return sprite_shapes[artwork]
+
+
+# The size of the canvas for a grid size, as in the preamble
+def canvas_size(size = None):
+    size = land_grab.grid_size if size is None else size
+    return (size * land_grab.cell_width + land_grab.x_margin * 2,
+            size * land_grab.cell_height + land_grab.y_margin * 2)
+
+
+# Replay a game with the engine and return which competitor holds
+# each cell at the end of the game (as a dictionary from cell numbers
+# to competitors, in the order they were stamped) and the result of
+# the game.  A competitor moving into a cell it already holds changes
+# nothing, so it is not stamped again.  The game is the one set up
+# in land_grab unless its size or starting cells are given.
+def game_claims(dataset, size = None, starts = None):
+    state = land_grab.GameState(*land_grab.game_setup(size, starts))
+    claims = {cell: competitor for competitor, cell in state.cells.items()}
+    for competitor, direction in dataset:
+        cell = state.apply_move(competitor, direction)
+        if claims.get(cell) != competitor:
+            claims.pop(cell, None)
+            claims[cell] = competitor
+    return claims, state.result()
+
+
+def svg_points(points, width, height):
+    return ' '.join('{:.1f},{:.1f}'.format(x + width / 2, height / 2 - y) for x, y in points)
+
+
+def svg_shape(shape, width, height):
+    points, fill_colour, line_colour, line_width = shape
+    if fill_colour:
+        return '<polygon points="{}" fill="{}" fill-rule="evenodd"/>'.format(
+            svg_points(points, width, height), colour_hex(fill_colour))
+    return ('<polyline points="{}" fill="none" stroke="{}" stroke-width="{}" '
+            'stroke-linecap="round" stroke-linejoin="round"/>').format(
+            svg_points(points, width, height), colour_hex(line_colour), line_width)
+
+
+def svg_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+# Text is anchored at its bottom left, middle or right, as turtle
+# writes it, with the lines of multi-line text going upwards
+def svg_text(text_item, width, height):
+    x, y, text, align, font, colour = text_item
+    font_size = font[1] * 4 / 3 # points to pixels
+    anchor = {'left': 'start', 'center': 'middle', 'right': 'end'}[align]
+    lines = text.split('\n')
+    top = height / 2 - y - font_size * (0.25 + 1.15 * (len(lines) - 1))
+    return ''.join('<text x="{:.1f}" y="{:.1f}" font-family="{}" font-size="{:.1f}" '
+                   'text-anchor="{}" fill="{}">{}</text>'.format(
+                       x + width / 2, top + 1.15 * font_size * line_no, font[0],
+                       font_size, anchor, colour_hex(colour), svg_escape(line))
+                   for line_no, line in enumerate(lines))
+
+
+# An SVG document showing the board and the competitors in the cells
+# they hold, given as a dictionary from cell numbers to competitors
+# such as the one from game_claims, for the same size and starts
+def render_svg(claims, winner = None, size = None, scale = 1,
+               bg_colour = 'light grey', starts = None, **board_options):
+    size, starts = land_grab.game_setup(size, starts)
+    with land_grab.configured_game(size, starts):
+        width, height = canvas_size(size)
+        shapes, texts = board_drawing(size, starts, bg_colour = bg_colour, **board_options)
+        parts = ['<svg xmlns="http://www.w3.org/2000/svg" '
+                 'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                 'width="{:.0f}" height="{:.0f}" viewBox="0 0 {:.0f} {:.0f}">'.format(
+                     width * scale, height * scale, width, height),
+                 '<defs>']
+        used = set(claims.values()) | ({winner} if winner is not None else set())
+        for competitor in land_grab.competitor_records:
+            if competitor in used:
+                parts.append('<g id="{}">'.format(competitor.replace(' ', '_')))
+                parts.extend(svg_shape(shape, 0, 0) for shape in competitor_shapes(competitor))
+                parts.append('</g>')
+        parts.append('</defs>')
+        parts.append('<rect width="100%" height="100%" fill="{}"/>'.format(colour_hex(bg_colour)))
+        parts.extend(svg_shape(shape, width, height) for shape in shapes)
+        parts.extend(svg_text(text_item, width, height) for text_item in texts)
+
+        def use(competitor, x, y):
+            return '<use xlink:href="#{}" x="{:.1f}" y="{:.1f}"/>'.format(
+                competitor.replace(' ', '_'), x + width / 2, height / 2 - y)
+        for cell, competitor in claims.items():
+            parts.append(use(competitor, *land_grab.cell_centre(*land_grab.cell_coordinate(cell, size), size)))
+        if winner is not None:
+            parts.append(use(winner, *land_grab.winner_position(size)))
+        else:
+            message = ('No competitors reached home', 'left', ('Arial', 15), 'black')
+            parts.append(svg_text(land_grab.no_winner_position(size) + message, width, height))
+        parts.append('</svg>')
+        return '\n'.join(parts) + '\n'
+
+
+class Raster:
+#   An RGB image of width x height pixels, with y increasing down
+#   the image.  Coordinates given to it are in pixels, so a pixel's
+#   centre is at (column + 0.5, row + 0.5).  If 'masked', it also
+#   keeps note of which pixels have been drawn on.
+
+    def __init__(self, width, height, colour = 'white', masked = False):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(bytes(colour_rgb(colour)) * (width * height))
+        self.mask = bytearray(width * height) if masked else None
+
+    # Fill a polygon (by the even-odd rule, as Tk does)
+    def fill_polygon(self, points, colour):
+        rgb = bytes(colour_rgb(colour))
+        edges = [(x0, y0, x1, y1) for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])
+                 if y0 != y1]
+        if not edges:
+            return
+        top = max(0, ceil(min(y for x, y in points) - 0.5))
+        bottom = min(self.height, ceil(max(y for x, y in points) - 0.5))
+        width, pixels, mask = self.width, self.pixels, self.mask
+        for row in range(top, bottom):
+            y = row + 0.5
+            crossings = sorted(x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+                               for x0, y0, x1, y1 in edges
+                               if (y0 <= y < y1) or (y1 <= y < y0))
+            for start_x, end_x in zip(crossings[0::2], crossings[1::2]):
+                start = max(0, ceil(start_x - 0.5))
+                end = min(width, ceil(end_x - 0.5))
+                if start < end:
+                    offset = row * width
+                    pixels[3 * (offset + start):3 * (offset + end)] = rgb * (end - start)
+                    if mask is not None:
+                        mask[offset + start:offset + end] = b'\x01' * (end - start)
+
+    # Draw a line through the points, as a rectangle around each
+    # segment that reaches half the line width past its ends
+    def draw_line(self, points, colour, line_width):
+        half = max(line_width, 1) / 2
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            length = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+            if length == 0:
+                continue
+            along_x, along_y = (x1 - x0) * half / length, (y1 - y0) * half / length
+            self.fill_polygon([(x0 - along_x - along_y, y0 - along_y + along_x),
+                               (x1 + along_x - along_y, y1 + along_y + along_x),
+                               (x1 + along_x + along_y, y1 + along_y - along_x),
+                               (x0 - along_x + along_y, y0 - along_y - along_x)], colour)
+
+    # Draw a shape given in canvas coordinates, with the canvas point
+    # (origin_x, origin_y) at the top left of the image
+    def draw_shape(self, shape, origin_x, origin_y, scale):
+        points, fill_colour, line_colour, line_width = shape
+        pixel_points = [((x - origin_x) * scale, (origin_y - y) * scale) for x, y in points]
+        if fill_colour:
+            self.fill_polygon(pixel_points, fill_colour)
+        else:
+            self.draw_line(pixel_points, line_colour, line_width * scale)
+
+    # The drawn part of each row, as a list of (row, column, pixels)
+    # runs, for copying onto another image
+    def runs(self):
+        found = []
+        width, mask = self.width, self.mask
+        for row in range(self.height):
+            column = 0
+            while column < width:
+                if mask[row * width + column]:
+                    end = column
+                    while end < width and mask[row * width + end]:
+                        end = end + 1
+                    offset = row * width
+                    found.append((row, column, bytes(self.pixels[3 * (offset + column):3 * (offset + end)])))
+                    column = end
+                else:
+                    column = column + 1
+        return found
+
+    # Copy runs of pixels onto this image with their top left corner
+    # at (left, top), clipped to the image
+    def paste(self, runs, left, top):
+        width, height, pixels = self.width, self.height, self.pixels
+        for row, column, run in runs:
+            y = top + row
+            x = left + column
+            if not 0 <= y < height:
+                continue
+            start, end = 0, len(run) // 3
+            if x < 0:
+                start = -x
+            if x + end > width:
+                end = width - x
+            if start < end:
+                offset = 3 * (y * width + x)
+                pixels[offset + 3 * start:offset + 3 * end] = run[3 * start:3 * end]
+
+    def png(self, level = 6):
+        row_bytes = 3 * self.width
+        rows = b''.join(b'\x00' + bytes(self.pixels[row * row_bytes:(row + 1) * row_bytes])
+                        for row in range(self.height))
+        def chunk(kind, data):
+            return (struct.pack('>I', len(data)) + kind + data
+                    + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+        return (b'\x89PNG\r\n\x1a\n'
+                + chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(rows, level))
+                + chunk(b'IEND', b''))
+
+
+# The board and the competitors rasterised for each grid size, scale
+# and set of board options, so they are only drawn once
+board_rasters = {}
+sprite_runs = {}
+
+def board_raster(size, scale, bg_colour = 'light grey', **board_options):
+    # The board's lines don't depend on where the competitors start
+    key = (size, scale, bg_colour, tuple(sorted(board_options.items())))
+    if key not in board_rasters:
+        width, height = canvas_size(size)
+        raster = Raster(max(1, round(width * scale)), max(1, round(height * scale)), bg_colour)
+        shapes, texts = board_drawing(size, bg_colour = bg_colour, **board_options)
+        for shape in shapes:
+            raster.draw_shape(shape, -width / 2, height / 2, scale)
+        board_rasters[key] = raster
+    return board_rasters[key]
+
+
+# A competitor rasterised on its own, with the pixels it covers
+# marked in the mask, and the offset from the middle of its cell to
+# the top left of the image
+sprite_rasters = {}
+
+def competitor_raster(competitor, scale):
+    key = (land_grab.sprite_artwork[competitor], scale)
+    if key not in sprite_rasters:
+        shapes = competitor_shapes(competitor)
+        margin = 1
+        left = min(x for shape in shapes for x, y in shape[0]) - margin
+        right = max(x for shape in shapes for x, y in shape[0]) + margin
+        bottom = min(y for shape in shapes for x, y in shape[0]) - margin
+        top = max(y for shape in shapes for x, y in shape[0]) + margin
+        raster = Raster(ceil((right - left) * scale), ceil((top - bottom) * scale), masked = True)
+        for shape in shapes:
+            raster.draw_shape(shape, left, top, scale)
+        sprite_rasters[key] = (raster, left * scale, -top * scale)
+    return sprite_rasters[key]
+
+
+# A competitor's pixels as runs, with the same offset
+def competitor_runs(competitor, scale):
+    key = (land_grab.sprite_artwork[competitor], scale)
+    if key not in sprite_runs:
+        raster, left, top = competitor_raster(competitor, scale)
+        sprite_runs[key] = (raster.runs(), left, top)
+    return sprite_runs[key]
+
+
+# The pixel at the top left of a competitor drawn at the canvas point
+# (x, y) of a picture of a grid of the given size
+def sprite_corner(competitor, x, y, size, scale):
+    raster, left, top = competitor_raster(competitor, scale)
+    width, height = canvas_size(size)
+    return (round((x + width / 2) * scale + left),
+            round((height / 2 - y) * scale + top))
+
+
+# A PNG image showing the board and the competitors in the cells
+# they hold, like render_svg but without text
+def render_png(claims, winner = None, size = None, scale = 0.25,
+               level = 6, starts = None, **board_options):
+    size, starts = land_grab.game_setup(size, starts)
+    with land_grab.configured_game(size, starts):
+        board = board_raster(size, scale, **board_options)
+        raster = Raster.__new__(Raster)
+        raster.width, raster.height, raster.mask = board.width, board.height, None
+        raster.pixels = bytearray(board.pixels)
+        def paste(competitor, x, y):
+            raster.paste(competitor_runs(competitor, scale)[0],
+                         *sprite_corner(competitor, x, y, size, scale))
+        for cell, competitor in claims.items():
+            paste(competitor, *land_grab.cell_centre(*land_grab.cell_coordinate(cell, size), size))
+        if winner is not None:
+            paste(winner, *land_grab.winner_position(size))
+        return raster.png(level)
+
+
+# Write a picture of a game to an SVG or PNG file, chosen by the
+# file name's extension, and return the game's result
+def save_game_image(file_name, dataset, size = None, scale = None, starts = None,
+                    **board_options):
+    size, starts = land_grab.game_setup(size, starts)
+    claims, result = game_claims(dataset, size, starts)
+    if file_name.lower().endswith('.svg'):
+        with open(file_name, 'w') as svg_file:
+            svg_file.write(render_svg(claims, result.winner, size, scale or 1,
+                                      starts = starts, **board_options))
+    else:
+        with open(file_name, 'wb') as png_file:
+            png_file.write(render_png(claims, result.winner, size, scale or 0.25,
+                                      starts = starts, **board_options))
+    return result
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Draw Land Grab games as SVG or PNG pictures.')
+    parser.add_argument('output', help = 'SVG or PNG file to write (with --games, the name of '
+                                         'each file has the seed added to it)')
+    parser.add_argument('--moves', metavar = 'FILE',
+                        help = "read the moves from FILE, one per line ('-' for standard input)")
+    parser.add_argument('--seed', type = int, default = None,
+                        help = 'seed for the random moves (the first seed with --games)')
+    parser.add_argument('--games', type = int, default = None,
+                        help = 'draw this many random games, one per seed')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'maximum number of rounds of random moves (default 35)')
+    parser.add_argument('--scale', type = float, default = None,
+                        help = 'size of the picture compared with the canvas '
+                               '(default 1 for SVG and 0.25 for PNG)')
+    options = parser.parse_args(args)
+
+    if options.games is None:
+        if options.moves is not None:
+            moves = land_grab.open_moves(options.moves)
+        else:
+            moves = land_grab.random_moves(options.seed, options.max_rounds, quiet = True)
+        print(save_game_image(options.output, moves, scale = options.scale))
+        return
+
+    stem, extension = os.path.splitext(options.output)
+    first_seed = options.seed or 0
+    for the_seed in range(first_seed, first_seed + options.games):
+        save_game_image('{}{}{}'.format(stem, the_seed, extension),
+                        land_grab.random_moves(the_seed, options.max_rounds, quiet = True),
+                        scale = options.scale)
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
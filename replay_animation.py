@@ -0,0 +1,302 @@
+#-----Animated Replays-----------------------------------------------#
+#
+# Exports a game as an animated GIF, without turtle or Tk, with one
+# frame for each move or for each round of moves.
+#
+# The game is played with the engine and drawn the way draw_moves
+# draws it: the competitors start in their corners, each move stamps
+# the competitor in its new cell, and the first competitor to reach
+# home is also stamped beside the grid.  The first frame is the whole
+# picture (made by offline_render); every later frame holds only the
+# stamps that changed the picture, each as a small image of one
+# competitor placed over the frame before, with the pixels around
+# the artwork left transparent.  A move that changes nothing, such
+# as one into the grid's edge, adds nothing but time to the frame.
+# So the size of the file grows with the number of moves, not with
+# the number of moves times the size of the board.
+#
+# Each competitor's image is compressed once and then reused for
+# every stamp, and the frames are written to the file as the moves
+# are played, so games read from a file or stream are never held in
+# memory.
+#
+# Run it from the command line, for example:
+#
+#     python replay_animation.py game.gif --seed 3 --fps 10
+#     python replay_animation.py game.gif --moves game.txt --per round
+
+import argparse
+import struct
+
+import land_grab
+import offline_render
+
+
+# Compress a sequence of colour indexes with GIF's variant of LZW,
+# and split the result into the sub-blocks of up to 255 bytes that
+# GIF images are stored in
+def lzw_encode(indexes, min_code_size):
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    output = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+    code_size = min_code_size + 1
+    next_code = end_code + 1
+    table = {}
+
+    # Codes are packed into bytes least significant bit first.  The
+    # code size grows once a code too big for it may be made, as
+    # the decoder expects.
+    def emit(code):
+        nonlocal bit_buffer, bit_count, code_size
+        bit_buffer |= code << bit_count
+        bit_count = bit_count + code_size
+        while bit_count >= 8:
+            output.append(bit_buffer & 0xff)
+            bit_buffer >>= 8
+            bit_count = bit_count - 8
+        if code == clear_code:
+            code_size = min_code_size + 1
+        elif next_code > (1 << code_size) - 1 and code_size < 12:
+            code_size = code_size + 1
+
+    emit(clear_code)
+    indexes = iter(indexes)
+    prefix = next(indexes, None)
+    if prefix is not None:
+        for index in indexes:
+            key = prefix << 8 | index
+            code = table.get(key)
+            if code is not None:
+                prefix = code
+                continue
+            emit(prefix)
+            if next_code < 4096:
+                table[key] = next_code
+                next_code = next_code + 1
+            else:
+                emit(clear_code)
+                table.clear()
+                next_code = end_code + 1
+            prefix = index
+        emit(prefix)
+    emit(end_code)
+    if bit_count:
+        output.append(bit_buffer & 0xff)
+
+    blocks = bytearray([min_code_size])
+    for start in range(0, len(output), 255):
+        block = output[start:start + 255]
+        blocks.append(len(block))
+        blocks.extend(block)
+    blocks.append(0)
+    return bytes(blocks)
+
+
+class GifWriter:
+#   Writes a GIF file one image at a time.  Every image uses the
+#   file's colour table, is drawn over the images before it, and can
+#   have a transparent colour.  Each image's delay is kept until the
+#   next image is added, so that time can still be added to it.
+
+    def __init__(self, output, width, height, colours, loop = 0):
+        self.output = output
+        self.colours = list(colours)
+        table_bits = 1
+        while (1 << table_bits) < len(self.colours) + 1:
+            table_bits = table_bits + 1
+        self.table_bits = table_bits
+        self.min_code_size = max(2, table_bits)
+        self.transparent = len(self.colours)
+        self.images = 0
+        self.held = None
+        table = bytearray()
+        for rgb in self.colours + [(0, 0, 0)] * ((1 << table_bits) - len(self.colours)):
+            table.extend(rgb)
+        output.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xf0 | (table_bits - 1), 0, 0)
+                     + bytes(table))
+        if loop is not None:
+            output.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+    # Add an image of 'width' x 'height' pixels with its top left at
+    # (left, top), given as LZW data from lzw_encode, shown for
+    # 'delay' hundredths of a second before the next image
+    def add_image(self, left, top, width, height, data, delay = 0, transparent = False):
+        self._write_held()
+        self.held = [left, top, width, height, data, delay, transparent]
+
+    def add_delay(self, delay):
+        if self.held is not None:
+            self.held[5] = self.held[5] + delay
+
+    def _write_held(self):
+        if self.held is None:
+            return
+        left, top, width, height, data, delay, transparent = self.held
+        # Graphic control: keep the image in place, with the delay and
+        # (optionally) the transparent colour
+        self.output.write(b'\x21\xf9\x04' + struct.pack('<BHBB', (1 << 2) | int(transparent),
+                                                        min(delay, 0xffff), self.transparent, 0))
+        self.output.write(b'\x2c' + struct.pack('<HHHHB', left, top, width, height, 0) + data)
+        self.images = self.images + 1
+        self.held = None
+
+    def close(self):
+        self._write_held()
+        self.output.write(b'\x3b')
+
+
+# The colour indexes of a raster's pixels, with any pixels not in the
+# mask (if given) set to the transparent index
+def raster_indexes(raster, colour_indexes, transparent = None):
+    pixels = raster.pixels
+    indexes = bytes(colour_indexes[rgb] for rgb in zip(pixels[0::3], pixels[1::3], pixels[2::3]))
+    if raster.mask is None or transparent is None:
+        return indexes
+    return bytes(index if covered else transparent
+                 for index, covered in zip(indexes, raster.mask))
+
+
+def raster_colours(raster):
+    pixels = raster.pixels
+    return set(zip(pixels[0::3], pixels[1::3], pixels[2::3]))
+
+
+# The frames of a game, as lists of the (competitor, x, y) stamps that
+# change the picture, in the order draw_moves makes them.  A frame is
+# made for every move or, with per = 'round', for every round of
+# moves (one move by each competitor).  The first frame places the
+# competitors in their starting cells.  After the last frame the
+# result of the game is sent to the generator's caller as the
+# StopIteration value.  The game is the one set up in land_grab
+# unless its size or starting cells are given.
+def frame_stamps(dataset, size = None, per = 'move', starts = None):
+    size, starts = land_grab.game_setup(size, starts)
+    state = land_grab.GameState(size, starts)
+    moves_per_frame = {'move': 1, 'round': len(state.names)}[per]
+    winner_position = land_grab.winner_position(size)
+    claims = {}
+
+    def stamp(competitor, cell):
+        if claims.get(cell) == competitor:
+            return []
+        claims[cell] = competitor
+        return [(competitor,) + land_grab.cell_centre(*land_grab.cell_coordinate(cell, size), size)]
+
+    first_frame = []
+    for competitor, cell in state.cells.items():
+        first_frame.extend(stamp(competitor, cell))
+    yield first_frame
+
+    frame = []
+    moves_in_frame = 0
+    for competitor, direction in dataset:
+        cell = state.apply_move(competitor, direction)
+        if state.home_move == state.move_count - 1:
+            frame.append((competitor,) + winner_position)
+        frame.extend(stamp(competitor, cell))
+        moves_in_frame = moves_in_frame + 1
+        if moves_in_frame == moves_per_frame:
+            yield frame
+            frame = []
+            moves_in_frame = 0
+    if moves_in_frame:
+        yield frame
+    return state.result()
+
+
+# The compressed image of each competitor's artwork, for each scale
+# and colour table
+sprite_images = {}
+
+def sprite_image(competitor, scale, colour_indexes, transparent, min_code_size):
+    key = (land_grab.sprite_artwork[competitor], scale, tuple(colour_indexes), min_code_size)
+    if key not in sprite_images:
+        raster = offline_render.competitor_raster(competitor, scale)[0]
+        sprite_images[key] = (raster.width, raster.height,
+                              lzw_encode(raster_indexes(raster, colour_indexes, transparent),
+                                         min_code_size))
+    return sprite_images[key]
+
+
+# Write a game to an animated GIF file and return the game's result.
+# Frames are shown at 'fps' frames per second, and the animation
+# plays 'loop' times (0 for forever, None for once without repeating).
+# The game is the one set up in land_grab unless its size or starting
+# cells are given.
+def export_gif(file_name, dataset, size = None, scale = 0.5, fps = 10,
+               per = 'move', loop = 0, starts = None, **board_options):
+    size, starts = land_grab.game_setup(size, starts)
+    with land_grab.configured_game(size, starts):
+        board = offline_render.board_raster(size, scale, **board_options)
+        colours = raster_colours(board)
+        for competitor in land_grab.competitor_records:
+            colours |= raster_colours(offline_render.competitor_raster(competitor, scale)[0])
+        colours = sorted(colours)
+        colour_indexes = {rgb: index for index, rgb in enumerate(colours)}
+        delay = max(2, round(100 / fps))
+
+        frames = frame_stamps(dataset, size, per, starts)
+        with open(file_name, 'wb') as gif_file:
+            writer = GifWriter(gif_file, board.width, board.height, colours, loop)
+
+            # The whole picture first
+            first = offline_render.Raster.__new__(offline_render.Raster)
+            first.width, first.height, first.mask = board.width, board.height, None
+            first.pixels = bytearray(board.pixels)
+            for competitor, x, y in next(frames):
+                first.paste(offline_render.competitor_runs(competitor, scale)[0],
+                            *offline_render.sprite_corner(competitor, x, y, size, scale))
+            writer.add_image(0, 0, first.width, first.height,
+                             lzw_encode(raster_indexes(first, colour_indexes), writer.min_code_size),
+                             delay)
+
+            # Then only the stamps that change it
+            while True:
+                try:
+                    frame = next(frames)
+                except StopIteration as finished:
+                    result = finished.value
+                    break
+                for stamp_no, (competitor, x, y) in enumerate(frame):
+                    width, height, data = sprite_image(competitor, scale, colour_indexes,
+                                                       writer.transparent, writer.min_code_size)
+                    left, top = offline_render.sprite_corner(competitor, x, y, size, scale)
+                    writer.add_image(left, top, width, height, data,
+                                     delay if stamp_no == len(frame) - 1 else 0, transparent = True)
+                if not frame:
+                    writer.add_delay(delay)
+            writer.close()
+    return result
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Export a Land Grab game as an animated GIF.')
+    parser.add_argument('output', help = 'GIF file to write')
+    parser.add_argument('--moves', metavar = 'FILE',
+                        help = "read the moves from FILE, one per line ('-' for standard input)")
+    parser.add_argument('--seed', type = int, default = None,
+                        help = 'seed for the random moves')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'maximum number of rounds of random moves (default 35)')
+    parser.add_argument('--per', choices = ['move', 'round'], default = 'move',
+                        help = 'make a frame for each move (the default) or each round')
+    parser.add_argument('--fps', type = land_grab.more_than_zero, default = 10,
+                        help = 'frames per second (default 10)')
+    parser.add_argument('--scale', type = float, default = 0.5,
+                        help = 'size of the animation compared with the canvas (default 0.5)')
+    options = parser.parse_args(args)
+    if options.moves is not None:
+        moves = land_grab.open_moves(options.moves)
+    else:
+        moves = land_grab.random_moves(options.seed, options.max_rounds, quiet = True)
+    print(export_gif(options.output, moves, scale = options.scale, fps = options.fps,
+                     per = options.per))
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
@@ -0,0 +1,207 @@
+#-----Replay Archive--------------------------------------------------#
+#
+# Stores many games in one file and reads them back through mmap, so
+# any game can be replayed, and the archive can be searched by
+# winner, without reading or decoding the rest of the file.
+#
+# The file is laid out as:
+#
+#   header   magic b'LGRA', format version, grid size, number of games
+#            and the file offset of the index (little-endian)
+#   moves    every game's moves in the packed format of move_codec,
+#            one game after another
+#   index    one column per field, each holding a value for every
+#            game: the file offset of the game's moves and its seed
+#            (8 bytes each), the number of moves and the index of
+#            the winning move (4 bytes each) and the winning
+#            competitor (1 byte)
+#
+# A missing seed, winner or winning move is stored as -2**63, -1 and
+# -1 respectively.  The index columns are read as memoryviews of the
+# mapped file, so opening an archive copies nothing.
+#
+# Run it from the command line, for example:
+#
+#     python replay_archive.py build games.lga --games 100000
+#     python replay_archive.py won games.lga 'Competitor C'
+#     python replay_archive.py replay games.lga 42
+
+import argparse
+import mmap
+import struct
+import sys
+from itertools import compress
+
+import land_grab
+import move_codec
+
+magic = b'LGRA'
+version = 1
+header_format = struct.Struct('<4sHHQQ')
+no_seed = -2 ** 63
+
+# The index columns, in the order they are stored, with their array
+# type codes (all are 8-byte aligned as long as the first one is)
+index_columns = [('offsets', 'Q'), ('seeds', 'q'), ('counts', 'I'),
+                 ('home_moves', 'i'), ('winners', 'b')]
+
+
+# Write an archive of games, given as (seed, dataset) pairs where the
+# seed may be None.  Each game is played by the engine as it is
+# written so that its winner can be stored in the index.
+def write_archive(file_name, games, size = None):
+    size = land_grab.grid_size if size is None else size
+    from array import array
+    columns = {name: array(typecode) for name, typecode in index_columns}
+    with open(file_name, 'wb') as archive:
+        archive.write(bytes(header_format.size))
+        for the_seed, dataset in games:
+            dataset = list(dataset)
+            result = land_grab.simulate(dataset, size)
+            columns['offsets'].append(archive.tell())
+            columns['seeds'].append(no_seed if the_seed is None else the_seed)
+            columns['counts'].append(len(dataset))
+            columns['home_moves'].append(-1 if result.home_move is None else result.home_move)
+            columns['winners'].append(-1 if result.winner is None
+                                      else land_grab.competitor_names.index(result.winner))
+            archive.write(move_codec.encode_moves(dataset))
+
+        # Start the index on an 8-byte boundary
+        archive.write(bytes(-archive.tell() % 8))
+        index_offset = archive.tell()
+        for name, typecode in index_columns:
+            column = columns[name]
+            if sys.byteorder == 'big':
+                column.byteswap()
+            archive.write(column.tobytes())
+        archive.seek(0)
+        archive.write(header_format.pack(magic, version, size,
+                                         len(columns['offsets']), index_offset))
+
+
+class ReplayArchive:
+
+    def __init__(self, file_name):
+        self.file = open(file_name, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        self.buffer = memoryview(self.map)
+        file_magic, file_version, self.grid_size, self.games, index_offset = \
+            header_format.unpack_from(self.map)
+        if file_magic != magic or file_version != version:
+            self.close()
+            raise ValueError(file_name + ' is not a Land Grab replay archive')
+
+        # Point each index column at its part of the mapped file
+        position = index_offset
+        for name, typecode in index_columns:
+            width = struct.calcsize(typecode)
+            column = self.buffer[position:position + width * self.games]
+            if sys.byteorder == 'big':
+                from array import array
+                column = array(typecode, column)
+                column.byteswap()
+            else:
+                column = column.cast(typecode)
+            setattr(self, name, column)
+            position = position + width * self.games
+
+    def __len__(self):
+        return self.games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        for name, typecode in index_columns:
+            if isinstance(getattr(self, name, None), memoryview):
+                getattr(self, name).release()
+        self.buffer.release()
+        try:
+            self.map.close()
+        except BufferError:
+            # A view from packed_moves is still held somewhere.  The
+            # map is left for garbage collection to close once the
+            # view has been released.
+            pass
+        self.file.close()
+
+    # The packed moves of game k, as a view of the mapped file.  The
+    # view should be released (or used in a with statement) before
+    # the archive is closed, or the file stays mapped until it is.
+    def packed_moves(self, k):
+        start = self.offsets[k]
+        return self.buffer[start:start + (self.counts[k] + 1) // move_codec.codes_per_byte]
+
+    # The moves of game k in the ['Competitor A', 'Left'] format,
+    # ready for process_moves or the game engine
+    def moves(self, k):
+        with self.packed_moves(k) as packed:
+            return move_codec.decode_moves(packed, self.counts[k])
+
+    # Play game k again with the headless engine, straight from its
+    # move codes
+    def replay(self, k):
+        with self.packed_moves(k) as packed:
+            codes = move_codec.unpack_codes(packed, self.counts[k])
+        return land_grab.GameState(self.grid_size).play_codes(codes)
+
+    def seed(self, k):
+        return None if self.seeds[k] == no_seed else self.seeds[k]
+
+    def winner(self, k):
+        code = self.winners[k]
+        return None if code < 0 else land_grab.competitor_names[code]
+
+    # The numbers of all the games won by a competitor (or, for None,
+    # the games nobody won), found from the index alone
+    def games_won_by(self, competitor):
+        code = -1 if competitor is None else land_grab.competitor_names.index(competitor)
+        return list(compress(range(self.games), map(code.__eq__, self.winners)))
+
+
+# Archive the games for a range of seeds made by random_moves
+def archive_random_games(file_name, first_seed, games, max_rounds = 35):
+    def seeded_games():
+        for the_seed in range(first_seed, first_seed + games):
+            yield the_seed, land_grab.random_moves(the_seed, max_rounds, quiet = True)
+    write_archive(file_name, seeded_games())
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Build, search and replay Land Grab game archives.')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    build = commands.add_parser('build', help = 'archive the games for a range of seeds')
+    build.add_argument('archive')
+    build.add_argument('--first-seed', type = int, default = 0)
+    build.add_argument('--games', type = int, default = 10000)
+    build.add_argument('--max-rounds', type = int, default = 35)
+    won = commands.add_parser('won', help = 'list the games a competitor won')
+    won.add_argument('archive')
+    won.add_argument('competitor', nargs = '?', default = None,
+                     help = "for example 'Competitor C' (default: games nobody won)")
+    replay = commands.add_parser('replay', help = 'print the moves and result of one game')
+    replay.add_argument('archive')
+    replay.add_argument('game', type = int)
+    options = parser.parse_args(args)
+
+    if options.command == 'build':
+        archive_random_games(options.archive, options.first_seed, options.games, options.max_rounds)
+        return
+    with ReplayArchive(options.archive) as archive:
+        if options.command == 'won':
+            for k in archive.games_won_by(options.competitor):
+                print(k, archive.seed(k), archive.home_moves[k])
+        else:
+            for move in archive.moves(options.game):
+                print(list(move))
+            print(archive.replay(options.game))
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
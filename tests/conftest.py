@@ -0,0 +1,6 @@
+# Let the tests import the game's modules from the top of the
+# repository, however pytest is started
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
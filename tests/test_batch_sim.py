@@ -0,0 +1,61 @@
+#-----Batch Simulator Tests------------------------------------------#
+#
+# batch_sim plays many games at once with NumPy, and must give the
+# same winner, winning move and final positions as the engine
+# (GameState.play) gives for each game on its own.
+#
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import batch_sim
+import land_grab
+
+
+# Compare every game of a BatchResult with the engine's result
+def assert_matches_engine(batch, datasets):
+    names = land_grab.competitor_names
+    for game_no, dataset in enumerate(datasets):
+        expected = land_grab.GameState().play(dataset)
+        winner = batch.winners[game_no]
+        assert (names[winner] if winner >= 0 else None) == expected.winner
+        assert batch.home_moves[game_no] == \
+            (-1 if expected.home_move is None else expected.home_move)
+        assert {name: tuple(batch.positions[game_no, code]) for code, name in enumerate(names)} \
+            == expected.positions
+
+
+# The moves of one game of a move array, in the dataset format
+def array_dataset(moves, order, game_no):
+    return [(land_grab.competitor_names[competitor],
+             land_grab.direction_names[moves[game_no, round_no, competitor]])
+            for round_no in range(moves.shape[1]) for competitor in order[game_no]
+            if moves[game_no, round_no, competitor] != batch_sim.no_move]
+
+
+def test_simulate_datasets_matches_play():
+    datasets = [land_grab.random_moves(seed, quiet = True) for seed in range(300)]
+    # Games not made of whole rounds, which are laid out a move a round
+    datasets = datasets + [[], [('Competitor C', 'Right')] * 3 + [('Competitor A', 'Down')],
+                           land_grab.random_moves(7, quiet = True)[:-1]]
+    assert_matches_engine(batch_sim.simulate_datasets(datasets), datasets)
+    assert_matches_engine(batch_sim.simulate_datasets(datasets[-3:]), datasets[-3:])
+
+
+@pytest.mark.parametrize('compatible', [False, True])
+def test_random_games_array_matches_play(compatible):
+    seeds = np.arange(1000, 1300)
+    moves, order = batch_sim.random_games_array(seeds, compatible = compatible)
+    datasets = [array_dataset(moves, order, game_no) for game_no in range(len(seeds))]
+    if compatible:
+        assert datasets == [[tuple(move) for move in land_grab.random_moves(seed, quiet = True)]
+                            for seed in seeds.tolist()]
+    assert_matches_engine(batch_sim.simulate_batch(moves, order), datasets)
+
+
+def test_no_games():
+    for compatible in (False, True):
+        moves, order = batch_sim.random_games_array([], compatible = compatible)
+        assert moves.shape == (0, 35, 4) and order.shape == (0, 4)
+        assert len(batch_sim.simulate_batch(moves, order).winners) == 0
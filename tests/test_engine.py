@@ -0,0 +1,81 @@
+#-----Engine Tests---------------------------------------------------#
+#
+# The engine (GameState) and the drawing path (process_moves) must
+# agree about every game: the result process_moves returns, and the
+# competitor left stamped in each cell, should be what the engine
+# works out without drawing anything.  Games are drawn with the
+# recording backend, so no display is needed.
+#
+
+import pytest
+
+import drawing_backends
+import land_grab
+import offline_render
+
+
+@pytest.fixture(autouse = True)
+def usual_game():
+    land_grab.configure_game()
+    land_grab.use_backend('recording')
+    yield
+    land_grab.configure_game()
+    land_grab.use_backend('null')
+
+
+# Draw a game on a fresh board and return its result and the
+# competitor stamped in each position
+def drawn_game(dataset, **options):
+    land_grab.create_drawing_canvas()
+    land_grab.reset_game()
+    result = land_grab.process_moves(dataset, **options)
+    return result, {position: stamp[0] for position, stamp in land_grab.stamps.items()}
+
+
+# The stamps the engine says a game leaves: the last competitor to
+# visit each cell, and the winner beside the grid
+def expected_stamps(dataset):
+    claims, result = offline_render.game_claims(dataset)
+    stamps = {land_grab.cell_centre(*land_grab.cell_coordinate(cell)): competitor
+              for cell, competitor in claims.items()}
+    if result.winner is not None:
+        stamps[land_grab.winner_position()] = result.winner
+    return stamps
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_play_matches_process_moves(seed):
+    dataset = land_grab.random_moves(seed, quiet = True)
+    expected = land_grab.GameState().play(dataset)
+    assert drawn_game(dataset) == (expected, expected_stamps(dataset))
+
+
+# Animated games read their moves as the frames are drawn, and must
+# end the same way
+def test_animated_game_matches_play():
+    dataset = land_grab.random_moves(3, quiet = True)
+    expected = land_grab.GameState().play(dataset)
+    assert drawn_game(iter(dataset), fps = 30, moves_per_frame = 3) == \
+        (expected, expected_stamps(dataset))
+
+
+def test_variant_matches_play():
+    starts = land_grab.spread_starts(6, 9)
+    land_grab.configure_game(9, starts)
+    dataset = land_grab.random_moves(5, 60, quiet = True, competitors = list(starts))
+    expected = land_grab.GameState(9, starts).play(dataset)
+    assert drawn_game(dataset) == (expected, expected_stamps(dataset))
+
+
+
+# The board is kept between games, but not once the competitors
+# labelled on it have changed
+def test_board_relabelled_for_other_competitors():
+    land_grab.use_backend(drawing_backends.RecordingPen(log = True))
+    land_grab.create_drawing_canvas()
+    land_grab.configure_game(7, land_grab.spread_starts(2, 7))
+    del land_grab.pen.log[:]
+    land_grab.create_drawing_canvas()
+    names = [args[0] for name, args in land_grab.pen.log
+             if name == 'write' and args[0].startswith('Competitor')]
+    assert [name.split()[1] for name in names] == ['A', 'B']
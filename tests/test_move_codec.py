@@ -0,0 +1,42 @@
+#-----Move Codec Tests-----------------------------------------------#
+#
+# Packing moves and unpacking them again must give back the same
+# moves, whether a game has an odd or an even number of moves.
+#
+
+import pytest
+
+import land_grab
+import move_codec
+
+fixed_data_sets = [land_grab.fixed_data_set_00, land_grab.fixed_data_set_01,
+                   land_grab.fixed_data_set_02, land_grab.fixed_data_set_03,
+                   land_grab.fixed_data_set_04, land_grab.fixed_data_set_05]
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_round_trip_random_games(seed):
+    dataset = land_grab.random_moves(seed, quiet = True)
+    for moves in (dataset, dataset[:-1], dataset[:1], []):
+        packed = move_codec.encode_moves(moves)
+        assert len(packed) == (len(moves) + 1) // 2
+        assert move_codec.decode_moves(packed, len(moves)) == [tuple(move) for move in moves]
+
+
+def test_round_trip_fixed_data_sets():
+    for dataset in fixed_data_sets:
+        packed = move_codec.encode_moves(dataset)
+        assert move_codec.decode_moves(packed, len(dataset)) == [tuple(move) for move in dataset]
+
+
+def test_round_trip_every_code():
+    codes = bytes(range(16)) * 3 + bytes([15])
+    assert move_codec.unpack_codes(move_codec.pack_codes(codes), len(codes)) == codes
+    assert move_codec.decode_codes(move_codec.encode_codes(move_codec.code_moves)) == \
+        move_codec.code_moves
+
+
+# The first move of a pair is in the high four bits
+def test_packed_layout():
+    moves = [('Competitor C', 'Up'), ('Competitor A', 'Left'), ('Competitor D', 'Down')]
+    assert move_codec.encode_moves(moves) == bytes([(2 * 4 + 2) << 4 | 0, (3 * 4 + 3) << 4])
@@ -0,0 +1,65 @@
+#-----Random Move Tests----------------------------------------------#
+#
+# random_moves must make exactly the games, and print exactly the
+# output, that it did before it had a generator of its own, and the
+# quiet and move code forms must make the same games for each seed.
+#
+
+import random
+
+import pytest
+
+import land_grab
+import move_codec
+
+
+# random_moves as it was first written, with the random module's
+# shared generator
+def original_random_moves(the_seed = None, max_rounds = 35):
+    print('\nWelcome to Land Grab!')
+    print('Here are the randomly-generated moves:')
+    random.seed(the_seed)
+    competitors = ['Competitor A', 'Competitor B', 'Competitor C', 'Competitor D',]
+    random.shuffle(competitors)
+    num_rounds = random.randint(0, max_rounds)
+    moves = []
+    for round_no in range(num_rounds):
+        print()
+        for competitor in competitors:
+            move = [competitor, random.choice(['Left', 'Right', 'Up', 'Down'])]
+            print(move)
+            moves.append(move)
+    print('\nThere were', len(competitors) * num_rounds,
+          'moves generated in', num_rounds,
+          ('round' if num_rounds == 1 else 'rounds'))
+    return moves
+
+
+@pytest.mark.parametrize('max_rounds', [0, 1, 35, 200])
+def test_same_output_as_original(capsys, max_rounds):
+    for seed in range(60):
+        expected = original_random_moves(seed, max_rounds)
+        expected_output = capsys.readouterr().out
+        assert land_grab.random_moves(seed, max_rounds) == expected
+        assert capsys.readouterr().out == expected_output
+        assert land_grab.random_moves(seed, max_rounds, quiet = True) == expected
+        assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('max_rounds', [1, 35])
+def test_move_codes_match_random_moves(max_rounds):
+    seeds = range(300)
+    games = land_grab.random_games(seeds, max_rounds)
+    for seed, codes in zip(seeds, games):
+        moves = land_grab.random_moves(seed, max_rounds, quiet = True)
+        assert codes == land_grab.random_move_codes(seed, max_rounds)
+        assert move_codec.decode_codes(codes) == [tuple(move) for move in moves]
+
+
+def test_move_codes_match_random_moves_for_other_competitors():
+    names = list(land_grab.spread_starts(7, 9))
+    for seed in range(50):
+        moves = land_grab.random_moves(seed, quiet = True, competitors = names)
+        codes = land_grab.random_move_codes(seed, count = len(names))
+        assert [(names[code >> 2], land_grab.direction_names[code & 3]) for code in codes] == \
+            [tuple(move) for move in moves]
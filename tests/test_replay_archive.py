@@ -0,0 +1,53 @@
+#-----Replay Archive Tests-------------------------------------------#
+#
+# An archive written and opened again must give back every game's
+# moves, seed and result, and answer searches by winner from its
+# index.
+#
+
+import land_grab
+import move_codec
+import replay_archive
+
+
+def test_write_open_and_replay(tmp_path):
+    file_name = str(tmp_path / 'games.lga')
+    datasets = [land_grab.random_moves(seed, quiet = True) for seed in range(200)]
+    games = [(seed, dataset) for seed, dataset in enumerate(datasets)]
+    games.append((None, land_grab.fixed_data_set_00))
+    datasets.append(land_grab.fixed_data_set_00)
+    replay_archive.write_archive(file_name, games)
+
+    with replay_archive.ReplayArchive(file_name) as archive:
+        assert len(archive) == len(datasets)
+        assert archive.grid_size == land_grab.grid_size
+        results = [land_grab.simulate(dataset) for dataset in datasets]
+        for k, dataset in enumerate(datasets):
+            assert archive.moves(k) == [tuple(move) for move in dataset]
+            assert archive.replay(k) == results[k]
+            assert archive.winner(k) == results[k].winner
+            assert archive.seed(k) == (None if k == len(datasets) - 1 else k)
+        for competitor in land_grab.competitor_names + [None]:
+            assert archive.games_won_by(competitor) == \
+                [k for k, result in enumerate(results) if result.winner == competitor]
+
+
+def test_archive_random_games(tmp_path):
+    file_name = str(tmp_path / 'games.lga')
+    replay_archive.archive_random_games(file_name, 1000, 50)
+    with replay_archive.ReplayArchive(file_name) as archive:
+        for k in range(50):
+            assert archive.seed(k) == 1000 + k
+            assert archive.replay(k) == land_grab.simulate(
+                land_grab.random_moves(1000 + k, quiet = True))
+
+
+# Closing the archive while a view of it is still held leaves the map
+# open for the view instead of failing
+def test_close_with_a_view_held(tmp_path):
+    file_name = str(tmp_path / 'games.lga')
+    replay_archive.archive_random_games(file_name, 0, 5)
+    with replay_archive.ReplayArchive(file_name) as archive:
+        packed = archive.packed_moves(2)
+        expected = archive.moves(2)
+    assert move_codec.decode_moves(packed, len(expected)) == expected
@@ -0,0 +1,27 @@
+#-----Tournament Tests-----------------------------------------------#
+#
+# Every game of a tournament has a random number generator of its
+# own, so the totals must not depend on how the seeds are split into
+# chunks or on how many worker processes play them.
+#
+
+import pytest
+
+import tournament
+
+
+@pytest.mark.parametrize('root_seed', [None, 12345])
+def test_totals_do_not_depend_on_workers_or_chunks(root_seed):
+    results = [tournament.run_tournament(first_seed = 100, games = 600, workers = workers,
+                                         chunk_size = chunk_size, root_seed = root_seed)
+               for workers, chunk_size in [(1, 600), (2, 70), (3, 1)]]
+    for result in results:
+        assert result.games == 600
+        assert (result.wins, result.arrivals) == (results[0].wins, results[0].arrivals)
+    assert sum(results[0].wins.values()) == 600
+
+
+# The same totals as playing every seed in one process
+def test_totals_match_play_seeds():
+    result = tournament.run_tournament(games = 300, workers = 2, chunk_size = 45)
+    assert (result.wins, result.arrivals) == tournament.play_seeds(0, 300)
@@ -0,0 +1,115 @@
+#-----Monte Carlo Tournament Runner----------------------------------#
+#
+# Plays every game in a range of seeds with random_moves and the
+# headless game engine, spread over several processes, and reports
+# how often each competitor won and when they reached home.
+#
+# Run it from the command line, for example:
+#
+#     python tournament.py --games 1000000 --workers 8
+
+import argparse
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import land_grab
+
+# The combined outcome of a tournament: how many games were played,
+# how many each competitor won (with None counting the games nobody
+# won), how many games were won on each move index, and how long the
+# tournament took in seconds
+TournamentResult = namedtuple('TournamentResult', ['games', 'wins', 'arrivals', 'seconds'])
+
+
+# Play the games for every seed in [first_seed, stop_seed) and return
+# the win counts and arrival-time histogram for just those games.
+# This is the unit of work sent to each worker process.  Each game
+# has a random number generator of its own, seeded with the game's
+# seed or, given a root seed, with land_grab.spawn_seed(root_seed,
+# seed), so the results never depend on how the seeds were split up.
+# Only the winner and the move that took them home are needed, so each
+# game stops as soon as someone reaches home.
+def play_seeds(first_seed, stop_seed, max_rounds = 35, root_seed = None):
+    wins = dict.fromkeys(land_grab.competitor_names + [None], 0)
+    arrivals = [0] * (max_rounds * len(land_grab.competitor_names))
+    for the_seed in range(first_seed, stop_seed):
+        if root_seed is not None:
+            the_seed = land_grab.spawn_seed(root_seed, the_seed)
+        state = land_grab.GameState()
+        state.play_codes(land_grab.random_move_codes(the_seed, max_rounds), stop_at_home = True)
+        wins[state.winner] += 1
+        if state.home_move is not None:
+            arrivals[state.home_move] += 1
+    return wins, arrivals
+
+
+def _play_chunk(chunk):
+    return play_seeds(*chunk)
+
+
+# Play one game for each of 'games' consecutive seeds starting at
+# 'first_seed', in chunks of 'chunk_size' seeds spread over 'workers'
+# processes (by default one per CPU), and return a TournamentResult.
+# The result is the same for any number of workers and chunk size.
+def run_tournament(first_seed = 0, games = 100000, max_rounds = 35,
+                   workers = None, chunk_size = 20000, root_seed = None):
+    stop_seed = first_seed + games
+    chunks = [(chunk_start, min(chunk_start + chunk_size, stop_seed), max_rounds, root_seed)
+              for chunk_start in range(first_seed, stop_seed, chunk_size)]
+
+    wins = dict.fromkeys(land_grab.competitor_names + [None], 0)
+    arrivals = [0] * (max_rounds * len(land_grab.competitor_names))
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk_wins, chunk_arrivals in pool.map(_play_chunk, chunks):
+            for competitor, count in chunk_wins.items():
+                wins[competitor] += count
+            for home_move, count in enumerate(chunk_arrivals):
+                arrivals[home_move] += count
+    seconds = time.perf_counter() - start_time
+    return TournamentResult(games, wins, arrivals, seconds)
+
+
+# Print a summary of a tournament's results
+def print_report(result):
+    print('Played', result.games, 'games in', round(result.seconds, 2), 'seconds',
+          '(' + str(round(result.games / max(result.seconds, 1e-9))), 'games per second)')
+    print()
+    for competitor in land_grab.competitor_names + [None]:
+        count = result.wins[competitor]
+        share = 100 * count / max(result.games, 1)
+        print('{:<28}{:>12}{:>9.3f}%'.format(competitor or 'No competitor reached home',
+                                            count, share))
+    print()
+    print('Move index when home was reached:')
+    for home_move, count in enumerate(result.arrivals):
+        if count:
+            print('{:>5}{:>12}'.format(home_move, count))
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Play a Land Grab tournament over a range of seeds.')
+    parser.add_argument('--first-seed', type = int, default = 0,
+                        help = 'seed of the first game (default 0)')
+    parser.add_argument('--games', type = int, default = 100000,
+                        help = 'number of games, one per consecutive seed (default 100000)')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'max_rounds passed to random_moves (default 35)')
+    parser.add_argument('--root-seed', type = int, default = None,
+                        help = 'derive each game\'s seed from this root seed and the game\'s '
+                               'number instead of using the number itself')
+    parser.add_argument('--workers', type = int, default = None,
+                        help = 'number of worker processes (default one per CPU)')
+    parser.add_argument('--chunk-size', type = int, default = 20000,
+                        help = 'number of seeds in each unit of work (default 20000)')
+    options = parser.parse_args(args)
+    print_report(run_tournament(options.first_seed, options.games, options.max_rounds,
+                                options.workers, options.chunk_size, options.root_seed))
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#
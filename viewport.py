@@ -0,0 +1,331 @@
+#-----Viewport Rendering---------------------------------------------#
+#
+# Shows a game on a board of any size through a window onto part of
+# the board, which can be scrolled and zoomed while the game plays.
+# The usual canvas is as big as the whole board, with every grid line
+# drawn, which is fine for 7x7 but not for a board of 1001x1001.  The
+# viewport draws only what is inside the window:
+#
+#   - the grid lines, labels and home marker of the visible cells
+#   - the competitors holding visible cells, each stamped at the
+#     viewport's zoom
+#   - the moves made inside the window; moves outside it are only
+#     remembered, and drawn if the window is scrolled over them
+#
+# So drawing the window costs the same for any size of board, and a
+# move off screen costs no drawing at all.  When zoomed out so far
+# that the artwork couldn't be made out, or replaying quickly, each
+# competitor is drawn as a block of its nation's colours instead (see
+# Fast mode in land_grab.py).
+#
+# The arrow keys scroll the window by a quarter of its size, + and -
+# zoom in and out, and H goes back to the home cell.
+#
+# Run it from the command line, for example:
+#
+#     python viewport.py --grid-size 1001 --competitors 40 --max-rounds 100000 --fps 30
+#     python viewport.py --moves game.txt --zoom 0.5
+
+import argparse
+from math import ceil, floor
+
+import land_grab
+
+# The zoom is kept between cells two pixels high and cells twice
+# their usual size
+min_zoom = 2 / land_grab.cell_height
+max_zoom = 2
+
+
+class Viewport:
+#   A window of 'width' x 'height' pixels onto a grid of 'size'
+#   cells square, centred on the cell (centre_column, centre_row),
+#   with each cell drawn 'zoom' times its usual size.  The
+#   competitor holding each cell visited so far is remembered in
+#   'claims', by cell number, so the window can be redrawn anywhere
+#   on the board.  Competitors are drawn at the given level of
+#   detail, or with detail = 'auto' at one chosen to suit the zoom
+#   and the speed of the replay.
+
+    def __init__(self, size = None, width = 960, height = 720, zoom = 1.0, centre = None,
+                 detail = 'auto'):
+        self.size = land_grab.grid_size if size is None else size
+        self.width = width
+        self.height = height
+        self.zoom = min(max(zoom, min_zoom), max_zoom)
+        home = self.size // 2
+        self.centre_column, self.centre_row = (home, home) if centre is None else centre
+        self.detail = detail
+        self.shown_detail = 'full'
+        self.fps = None
+        self.moves_per_frame = 1
+        self.claims = {}
+        self.view = (0, -1, 0, -1)
+        self.status = ''
+        self.board_turtle = None
+        self.status_turtle = None
+        self.redraws = 0
+
+    # Set up the window and the turtles for the board and the status
+    # line
+    def open_window(self, title = 'Land Grab'):
+        pen = land_grab.pen
+        pen.setup(self.width, self.height)
+        pen.title(title)
+        pen.bgcolor('light grey')
+        pen.tracer(False)
+        pen.hideturtle()
+        self.board_turtle = pen.Turtle()
+        self.board_turtle.hideturtle()
+        self.status_turtle = pen.Turtle()
+        self.status_turtle.hideturtle()
+
+    # Let the keyboard scroll and zoom the window
+    def bind_keys(self):
+        pen = land_grab.pen
+        pen.onkey(lambda: self.scroll(-1, 0), 'Left')
+        pen.onkey(lambda: self.scroll(1, 0), 'Right')
+        pen.onkey(lambda: self.scroll(0, 1), 'Up')
+        pen.onkey(lambda: self.scroll(0, -1), 'Down')
+        for key in ('plus', 'equal'):
+            pen.onkey(lambda: self.zoom_by(2), key)
+        pen.onkey(lambda: self.zoom_by(1 / 2), 'minus')
+        pen.onkey(self.centre_on_home, 'h')
+        pen.listen()
+
+    # The size of a cell in the window, in pixels
+    def cell_size(self):
+        return land_grab.cell_width * self.zoom, land_grab.cell_height * self.zoom
+
+    # The first and last columns and rows with any part inside the
+    # window
+    def visible_cells(self):
+        cell_width, cell_height = self.cell_size()
+        half_columns = self.width / 2 / cell_width
+        half_rows = self.height / 2 / cell_height
+        return (max(0, ceil(self.centre_column - 0.5 - half_columns)),
+                min(self.size - 1, floor(self.centre_column + 0.5 + half_columns)),
+                max(0, ceil(self.centre_row - 0.5 - half_rows)),
+                min(self.size - 1, floor(self.centre_row + 0.5 + half_rows)))
+
+    # The middle of a cell in window coordinates
+    def cell_position(self, column, row):
+        cell_width, cell_height = self.cell_size()
+        return ((column - self.centre_column) * cell_width,
+                (row - self.centre_row) * cell_height)
+
+    # Draw a competitor in a cell (which must be visible)
+    def stamp(self, competitor, column, row):
+        land_grab.stamp_competitor(competitor, self.cell_position(column, row), self.shown_detail)
+
+    # Draw the whole window again, after it has been scrolled or
+    # zoomed.  Only the visible cells are looked at: those in the
+    # window, or those claimed, whichever are fewer.
+    def redraw(self):
+        pen = land_grab.pen
+        pen.clear()
+        land_grab.stamps.clear()
+        self.view = first_column, last_column, first_row, last_row = self.visible_cells()
+        if self.detail == 'auto':
+            self.shown_detail = land_grab.choose_detail(self.fps, self.moves_per_frame, self.zoom)
+        else:
+            self.shown_detail = self.detail
+        self.draw_board()
+        pen.shapesize(self.zoom, self.zoom)
+        size = self.size
+        claims = self.claims
+        visible = (last_column - first_column + 1) * (last_row - first_row + 1)
+        if visible < len(claims):
+            for row in range(first_row, last_row + 1):
+                for column in range(first_column, last_column + 1):
+                    competitor = claims.get(row * size + column)
+                    if competitor is not None:
+                        self.stamp(competitor, column, row)
+        else:
+            for cell, competitor in claims.items():
+                row, column = divmod(cell, size)
+                if first_column <= column <= last_column and first_row <= row <= last_row:
+                    self.stamp(competitor, column, row)
+        self.write_status()
+        self.redraws = self.redraws + 1
+
+    # Draw the grid lines, the home marker and (when the cells are big
+    # enough to read them) the labels of the visible cells
+    def draw_board(self):
+        first_column, last_column, first_row, last_row = self.view
+        cell_width, cell_height = self.cell_size()
+        left, bottom = self.cell_position(first_column - 0.5, first_row - 0.5)
+        right, top = self.cell_position(last_column + 0.5, last_row + 0.5)
+        self.board_turtle.clear()
+        with land_grab.drawing_with(self.board_turtle):
+            pen = land_grab.pen
+            pen.penup()
+            pen.color('grey')
+            pen.width(max(1, round(2 * self.zoom)))
+            for row in range(first_row, last_row + 2):
+                pen.goto(left, bottom + (row - first_row) * cell_height)
+                pen.pendown()
+                pen.goto(right, bottom + (row - first_row) * cell_height)
+                pen.penup()
+            for column in range(first_column, last_column + 2):
+                pen.goto(left + (column - first_column) * cell_width, bottom)
+                pen.pendown()
+                pen.goto(left + (column - first_column) * cell_width, top)
+                pen.penup()
+
+            home = self.size // 2
+            if first_column <= home <= last_column and first_row <= home <= last_row:
+                pen.goto(self.cell_position(home, home))
+                pen.dot(max(3, 30 * self.zoom))
+
+            # Column letters along the bottom of the window and row
+            # numbers down its left side, so they stay in sight
+            if self.zoom >= land_grab.detail_zoom:
+                font = ('Arial', 10, 'normal')
+                for column in range(first_column, last_column + 1):
+                    pen.goto(self.cell_position(column, 0)[0], -self.height / 2 + 4)
+                    pen.write(land_grab.letter_label(column), align = 'center', font = font)
+                for row in range(first_row, last_row + 1):
+                    pen.goto(-self.width / 2 + 4, self.cell_position(0, row)[1] - 6)
+                    pen.write(str(row + 1), align = 'left', font = font)
+
+    # Write the result of the game, once known, at the top of the
+    # window
+    def write_status(self):
+        self.status_turtle.clear()
+        if self.status:
+            with land_grab.drawing_with(self.status_turtle):
+                land_grab.pen.penup()
+                land_grab.pen.goto(-self.width / 2 + 10, self.height / 2 - 30)
+                land_grab.pen.write(self.status, font = ('Arial', 15, 'normal'))
+
+    # Scroll the window by a quarter of its width or height for each
+    # step, keeping its middle on the board
+    def scroll(self, column_steps, row_steps):
+        cell_width, cell_height = self.cell_size()
+        self.centre_on(self.centre_column + column_steps * max(1, round(self.width / 4 / cell_width)),
+                       self.centre_row + row_steps * max(1, round(self.height / 4 / cell_height)))
+
+    def centre_on(self, column, row):
+        self.centre_column = min(max(column, 0), self.size - 1)
+        self.centre_row = min(max(row, 0), self.size - 1)
+        self.redraw()
+        land_grab.refresh_screen()
+
+    def centre_on_home(self):
+        self.centre_on(self.size // 2, self.size // 2)
+
+    def zoom_by(self, factor):
+        self.zoom = min(max(self.zoom * factor, min_zoom), max_zoom)
+        self.redraw()
+        land_grab.refresh_screen()
+
+    # Apply each move to the game state and draw it if it changes a
+    # visible cell, pausing after each move for the render scheduler
+    # (as land_grab.draw_moves does)
+    def draw_moves(self, state, dataset):
+        codes = state.codes
+        directions = land_grab.direction_codes
+        columns = state.columns
+        rows = state.rows
+        size = state.size
+        claims = self.claims
+        for competitor, direction in dataset:
+            code = codes[competitor]
+            state.apply_code(code * 4 + directions[direction])
+            column = columns[code]
+            row = rows[code]
+            cell = row * size + column
+            if claims.get(cell) != competitor:
+                claims[cell] = competitor
+                first_column, last_column, first_row, last_row = self.view
+                if first_column <= column <= last_column and first_row <= row <= last_row:
+                    self.stamp(competitor, column, row)
+            if state.home_move == state.move_count - 1:
+                self.status = competitor + ' reached home on move ' + str(state.home_move + 1)
+                self.write_status()
+            yield competitor
+        if state.winner is None:
+            self.status = 'No competitors reached home after ' + str(state.move_count) + ' moves'
+            self.write_status()
+
+    # Play a game in the window, starting from the given starting
+    # cells (the usual corners by default) and drawn as
+    # land_grab.process_moves draws it, and return the game state.
+    # When animated the moves are drawn by timer events, so the state
+    # is only complete once the game has been drawn.
+    def play(self, dataset, starts = None, fps = None, moves_per_frame = 1):
+        state = land_grab.GameState(self.size, starts)
+        self.claims.clear()
+        self.claims.update((cell, competitor) for competitor, cell in state.cells.items())
+        self.status = ''
+        self.fps = fps
+        self.moves_per_frame = moves_per_frame
+        self.redraw()
+        scheduler = land_grab.RenderScheduler(fps, moves_per_frame)
+        scheduler.play(self.draw_moves(state, dataset))
+        return state
+
+
+def main(args = None):
+    parser = argparse.ArgumentParser(description = 'Play Land Grab in a scrollable, zoomable window.')
+    parser.add_argument('--moves', metavar = 'FILE',
+                        help = "read the moves from FILE, one per line ('-' for standard input)")
+    parser.add_argument('--seed', type = int, default = None,
+                        help = 'seed for the random moves')
+    parser.add_argument('--max-rounds', type = int, default = 35,
+                        help = 'maximum number of rounds of random moves (default 35)')
+    parser.add_argument('--grid-size', type = int, default = 7,
+                        help = 'width and height of the grid, an odd number of cells (default 7)')
+    parser.add_argument('--competitors', type = int, default = 4,
+                        help = 'number of competitors, spread around the edge of the grid '
+                               '(default 4)')
+    parser.add_argument('--zoom', type = float, default = 1.0,
+                        help = 'size of the cells compared with the usual board (default 1)')
+    parser.add_argument('--width', type = int, default = 960,
+                        help = 'width of the window in pixels (default 960)')
+    parser.add_argument('--height', type = int, default = 720,
+                        help = 'height of the window in pixels (default 720)')
+    parser.add_argument('--detail', choices = ['auto'] + land_grab.sprite_details, default = 'auto',
+                        help = "draw the competitors' full artwork, or plain blocks or dots in "
+                               "their colours (by default, chosen to suit the zoom and speed)")
+    parser.add_argument('--fps', type = land_grab.more_than_zero, default = None,
+                        help = 'animate the game at this many frames per second')
+    parser.add_argument('--moves-per-frame', type = land_grab.at_least_one, default = 1,
+                        help = 'number of moves drawn in each frame (default 1)')
+    parser.add_argument('--backend', choices = ['turtle', 'null', 'recording'], default = 'turtle',
+                        help = "draw with turtle (the default), draw nothing ('null') or draw "
+                               "nothing and count the drawing calls ('recording')")
+    options = parser.parse_args(args)
+
+    starts = land_grab.spread_starts(options.competitors, options.grid_size)
+    land_grab.configure_game(options.grid_size, starts)
+    if options.moves is not None:
+        moves = land_grab.open_moves(options.moves)
+    else:
+        moves = land_grab.random_moves(options.seed, options.max_rounds, quiet = True,
+                                       competitors = list(starts))
+
+    if options.backend == 'turtle':
+        land_grab.load_turtle()
+    else:
+        land_grab.use_backend(options.backend)
+    viewport = Viewport(options.grid_size, options.width, options.height, options.zoom,
+                        detail = options.detail)
+    viewport.open_window()
+    viewport.bind_keys()
+    state = viewport.play(moves, starts, options.fps, options.moves_per_frame)
+    # Keep the window open, so it can still be scrolled and zoomed
+    # (and animated games can play)
+    land_grab.pen.done()
+    print(state.result().winner, 'after', state.move_count, 'moves')
+    if options.backend == 'recording':
+        print(land_grab.pen.total(), 'drawing calls')
+    return state.result()
+
+
+if __name__ == '__main__':
+    main()
+
+#
+#--------------------------------------------------------------------#